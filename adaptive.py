@@ -0,0 +1,129 @@
+# adaptive.py
+import logging
+import time
+from config import (
+    DAEMON_INTERVAL, ADAPTIVE_MIN_INTERVAL, ADAPTIVE_MAX_INTERVAL, ADAPTIVE_BUDGET_PER_MINUTE,
+    ADAPTIVE_LEARN_DAYS, ADAPTIVE_WINDOW_MINUTES, ADAPTIVE_MIN_RESTOCKS
+)
+
+SLOT_MINUTES = 15
+WEEK_SLOTS = 7 * 24 * 60 // SLOT_MINUTES
+DAY_SLOTS = 24 * 60 // SLOT_MINUTES
+# Weight of the same time on other weekdays relative to the same weekday
+DAILY_WEIGHT = 0.5
+PROFILE_REFRESH_SECONDS = 3600
+
+
+def week_slot(ts):
+    """Return the local 15-minute slot of the week (0 = Monday 00:00) for a timestamp"""
+    t = time.localtime(ts)
+    return (t.tm_wday * 24 * 60 + t.tm_hour * 60 + t.tm_min) // SLOT_MINUTES
+
+
+def restock_profile(restock_times, window_minutes=ADAPTIVE_WINDOW_MINUTES):
+    """Build a per-slot "restock heat" profile (0..1) over the week from past restock times
+
+    Each restock warms the slots within window_minutes of its time of week,
+    and (at DAILY_WEIGHT) the same time of day on every other weekday.
+    """
+    window = max(1, window_minutes // SLOT_MINUTES)
+    scores = [0.0] * WEEK_SLOTS
+
+    for ts in restock_times:
+        slot = week_slot(ts)
+        for day in range(7):
+            center = (slot % DAY_SLOTS) + day * DAY_SLOTS
+            weight = 1.0 if center == slot else DAILY_WEIGHT
+            for offset in range(-window, window + 1):
+                scores[(center + offset) % WEEK_SLOTS] += weight * (1 - abs(offset) / (window + 1))
+
+    peak = max(scores)
+    return [score / peak for score in scores] if peak else scores
+
+
+class AdaptiveScheduler:
+    """Polling-interval policy learned from each SKU's recorded restocks
+
+    SKUs are polled at min_interval around the times of week they usually
+    restock and back off towards max_interval in their quiet periods; SKUs
+    without enough history (or currently in stock) keep their fixed
+    interval. If the planned intervals add up to more page loads than the
+    per-minute budget, quiet SKUs are slowed down first, then all of them.
+    """
+
+    def __init__(self, history, entries, base_interval=DAEMON_INTERVAL, min_interval=ADAPTIVE_MIN_INTERVAL,
+                 max_interval=ADAPTIVE_MAX_INTERVAL, budget_per_minute=ADAPTIVE_BUDGET_PER_MINUTE,
+                 learn_days=ADAPTIVE_LEARN_DAYS):
+        self.history = history
+        self.entries = entries
+        self.base_interval = base_interval
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.budget_per_minute = budget_per_minute
+        self.learn_days = learn_days
+        self.profiles = {}
+        self.profiles_built = 0
+        self.plan = {}
+        self.planned_at = 0
+        self.logger = logging.getLogger(__name__)
+
+    def key(self, entry):
+        return entry["product_url"], entry["pincode"]
+
+    def refresh_profiles(self, now):
+        """Re-learn every SKU's restock profile from the history store"""
+        since = now - self.learn_days * 86400
+        self.profiles = {}
+        for entry in self.entries:
+            restocks = self.history.restock_times(entry["product_url"], entry["pincode"], since=since)
+            if len(restocks) >= ADAPTIVE_MIN_RESTOCKS:
+                self.profiles[self.key(entry)] = restock_profile(restocks)
+        self.profiles_built = now
+        self.logger.info(f"📈 Learned restock patterns for {len(self.profiles)}/{len(self.entries)} SKU(s)")
+
+    def desired_interval(self, entry, now):
+        """Return the interval a SKU would get without the budget, and its heat"""
+        base = entry.get("interval") or self.base_interval
+        profile = self.profiles.get(self.key(entry))
+        if profile is None:
+            return base, 1.0
+
+        latest = self.history.last_status(entry["product_url"], entry["pincode"])
+        if latest and latest["stock_status"] == "IN_STOCK":
+            # Keep watching at the normal rate until it sells out again
+            return base, 1.0
+
+        heat = profile[week_slot(now)]
+        return self.max_interval - (self.max_interval - self.min_interval) * heat, heat
+
+    def replan(self, now):
+        """Plan every SKU's interval for the coming minute within the request budget"""
+        if now - self.profiles_built >= PROFILE_REFRESH_SECONDS:
+            self.refresh_profiles(now)
+
+        desired = {self.key(entry): self.desired_interval(entry, now) for entry in self.entries}
+        plan = {key: interval for key, (interval, heat) in desired.items()}
+
+        def rate():
+            return sum(60 / interval for interval in plan.values())
+
+        if rate() > self.budget_per_minute:
+            # Slow the quiet SKUs down to the max interval first...
+            for key, (interval, heat) in desired.items():
+                if heat < 0.5:
+                    plan[key] = max(interval, self.max_interval)
+            # ...then everyone proportionally if that is still not enough
+            excess = rate() / self.budget_per_minute
+            if excess > 1:
+                plan = {key: interval * excess for key, interval in plan.items()}
+            self.logger.info(f"📉 Polling plan scaled to stay within {self.budget_per_minute} checks/minute")
+
+        self.plan = plan
+        self.planned_at = now
+
+    def interval(self, entry, now=None):
+        """Return the seconds until a SKU's next check"""
+        now = time.time() if now is None else now
+        if now - self.planned_at >= 60:
+            self.replan(now)
+        return self.plan.get(self.key(entry), entry.get("interval") or self.base_interval)
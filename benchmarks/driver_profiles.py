@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Compare the standard and lean Chrome profiles on the stand-in shop's saved product pages
+Reports bytes transferred, peak browser memory and per-check latency
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+from urllib.parse import urlparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from checker import AmulStockChecker, build_chrome_options, launch_chrome
+from config import DRIVER_PROFILES
+from standin_server import StandInShopServer, ERROR_ALIAS, TRACKER_HOST, load_fixture
+from sampling import ProcessTreeSampler
+
+
+def benchmark_profile(server, profile, cases, rounds, headless=True):
+    """Run every case `rounds` times on one browser of the given profile"""
+    chrome_options = build_chrome_options(headless, profile)
+    # Send the page's tracker requests to the stand-in so their bytes are counted too
+    port = urlparse(server.base_url).port
+    chrome_options.add_argument(f"--host-resolver-rules=MAP {TRACKER_HOST} 127.0.0.1:{port}")
+    driver = launch_chrome(headless, profile, chrome_options)
+
+    checker = AmulStockChecker(driver=driver, log_file=os.devnull, record_results=False, use_session_cache=False)
+    pairs = [(f"{server.base_url}/en/product/{case['alias']}", case["pincode"]) for case in cases]
+    expected = {(f"{server.base_url}/en/product/{case['alias']}", case["pincode"]): case["status"] for case in cases}
+
+    latencies = []
+    mismatches = 0
+    server.reset_traffic()
+    try:
+        with ProcessTreeSampler(driver.service.process.pid) as memory:
+            for _ in range(rounds):
+                # Start every round from a fresh session so the pincode flow is measured too
+                checker.selected_pincode = None
+                for record in checker.check_batch(pairs):
+                    latencies.append(sum(record["timings"].values()))
+                    mismatches += record["status"] != expected[(record["product_url"], record["pincode"])]
+    finally:
+        driver.quit()
+
+    checks = len(latencies)
+    traffic = dict(server.traffic)
+    return {
+        "profile": profile,
+        "checks": checks,
+        "mismatches": mismatches,
+        "bytes_per_check": sum(traffic.values()) / checks,
+        "bytes_by_kind": {kind: size / checks for kind, size in sorted(traffic.items())},
+        "peak_rss_mb": round(memory.peak_rss_mb, 1),
+        "latency_p50": round(statistics.median(latencies), 3),
+        "latency_mean": round(statistics.mean(latencies), 3),
+    }
+
+
+def print_results(results):
+    print(f"{'profile':<10} {'KB/check':>10} {'peak RSS MB':>12} {'p50 s':>8} {'mean s':>8} {'mismatches':>11}")
+    for result in results:
+        print(f"{result['profile']:<10} {result['bytes_per_check'] / 1024:>10.1f} {result['peak_rss_mb']:>12.1f} "
+              f"{result['latency_p50']:>8.2f} {result['latency_mean']:>8.2f} {result['mismatches']:>11}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the Chrome driver profiles against the stand-in shop')
+    parser.add_argument('--rounds', type=int, default=3, help='Times every saved page is checked per profile')
+    parser.add_argument('--profiles', nargs='+', choices=DRIVER_PROFILES, default=list(DRIVER_PROFILES), help='Profiles to compare')
+    parser.add_argument('--no-headless', action='store_true', help='Show the browser windows')
+    parser.add_argument('--output', type=str, help='Also write the results to this JSON file')
+
+    args = parser.parse_args()
+
+    cases = [case for case in load_fixture("http", "expected.json") if case["alias"] != ERROR_ALIAS]
+    with StandInShopServer() as server:
+        results = [benchmark_profile(server, profile, cases, args.rounds, not args.no_headless)
+                   for profile in args.profiles]
+
+    print_results(results)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
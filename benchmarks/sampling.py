@@ -0,0 +1,31 @@
+# sampling.py
+import os
+import threading
+from proctree import process_stats
+
+
+class ProcessTreeSampler:
+    """Samples the peak memory and Chrome process count of a process tree in the background"""
+
+    def __init__(self, pid=None, interval=0.2):
+        self.pid = pid or os.getpid()
+        self.interval = interval
+        self.peak_rss_mb = 0
+        self.peak_chrome_processes = 0
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+
+    def run(self):
+        while not self.stopped.is_set():
+            rss_mb, chrome_processes = process_stats(self.pid)
+            self.peak_rss_mb = max(self.peak_rss_mb, rss_mb)
+            self.peak_chrome_processes = max(self.peak_chrome_processes, chrome_processes)
+            self.stopped.wait(self.interval)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stopped.set()
+        self.thread.join()
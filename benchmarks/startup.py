@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Cold-start benchmark for the CLI
+Runs each command in a fresh interpreter with `python -X importtime` and reports
+wall time, total import time and the slowest top-level imports
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCHMARK_DIR)
+RESULTS_DIR = os.path.join(BENCHMARK_DIR, "results")
+MAIN = os.path.join(REPO_DIR, "main.py")
+
+# Commands that start without touching the shop, the crontab or the network
+COMMANDS = {
+    "help": [MAIN, "--help"],
+    "status": [MAIN, "--status"],
+    "import cron": ["-c", "import cron"],
+    "import http engine": ["-c", "import http_checker"],
+    "import selenium engine": ["-c", "import checker"],
+}
+
+
+def parse_importtime(stderr):
+    """Return {module: cumulative microseconds} of the top-level imports in -X importtime output"""
+    imports = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        # Nested imports are indented below the module that imported them
+        if not name.startswith("  "):
+            imports[name.strip()] = int(cumulative)
+    return imports
+
+
+def run_command(args, cwd):
+    """Run one command cold; returns (wall seconds, {module: cumulative us})"""
+    env = {**os.environ, "PYTHONPATH": REPO_DIR, "PYTHONDONTWRITEBYTECODE": "1"}
+    started = time.perf_counter()
+    result = subprocess.run([sys.executable, "-X", "importtime", *args], cwd=cwd, env=env,
+                            capture_output=True, text=True)
+    wall_time = time.perf_counter() - started
+    if result.returncode != 0:
+        raise RuntimeError(f"{' '.join(args)} exited with {result.returncode}: {result.stderr.strip()[-200:]}")
+    return wall_time, parse_importtime(result.stderr)
+
+
+def benchmark_command(args, rounds, cwd, top):
+    """Run a command `rounds` times and summarize its wall and import times"""
+    wall_times = []
+    import_totals = []
+    modules = {}
+    for _ in range(rounds):
+        wall_time, imports = run_command(args, cwd)
+        wall_times.append(wall_time)
+        import_totals.append(sum(imports.values()) / 1e6)
+        for name, micros in imports.items():
+            modules.setdefault(name, []).append(micros / 1e6)
+
+    slowest = sorted(modules.items(), key=lambda item: statistics.median(item[1]), reverse=True)[:top]
+    return {
+        "wall_time_p50": round(statistics.median(wall_times), 4),
+        "import_time_p50": round(statistics.median(import_totals), 4),
+        "slowest_imports": {name: round(statistics.median(times), 4) for name, times in slowest},
+    }
+
+
+def print_results(results, baseline=None):
+    for command, result in results["commands"].items():
+        line = f"\n🚀 {command}: {result['wall_time_p50'] * 1000:.0f} ms wall, {result['import_time_p50'] * 1000:.0f} ms importing"
+        previous = (baseline or {}).get("commands", {}).get(command)
+        if previous:
+            line += f" (was {previous['wall_time_p50'] * 1000:.0f} ms / {previous['import_time_p50'] * 1000:.0f} ms)"
+        print(line)
+        for name, seconds in result["slowest_imports"].items():
+            print(f"   {name:<32} {seconds * 1000:8.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure the cold-start time and import cost of the CLI commands')
+    parser.add_argument('--commands', nargs='+', choices=list(COMMANDS), default=list(COMMANDS), help='Commands to measure')
+    parser.add_argument('--rounds', type=int, default=5, help='Cold starts per command')
+    parser.add_argument('--top', type=int, default=8, help='Slowest top-level imports to show per command')
+    parser.add_argument('--output', type=str, help=f'Results JSON file (default: a timestamped file in {RESULTS_DIR})')
+    parser.add_argument('--compare', type=str, help='Previous results JSON file to compare against')
+
+    args = parser.parse_args()
+
+    results = {
+        "started_at": datetime.now().isoformat(),
+        "python": sys.version.split()[0],
+        "rounds": args.rounds,
+        "commands": {},
+    }
+    # An empty working directory, so --status finds no history to read
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for command in args.commands:
+            print(f"🏁 Measuring {command}...")
+            results["commands"][command] = benchmark_command(COMMANDS[command], args.rounds, tmp_dir, args.top)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, "r") as f:
+            baseline = json.load(f)
+    print_results(results, baseline)
+
+    output = args.output or os.path.join(RESULTS_DIR, f"startup-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"\n💾 Results saved to {output}")
+
+
+if __name__ == "__main__":
+    main()
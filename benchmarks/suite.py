@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+Offline benchmark suite for the stock check engines
+Runs each engine's run_stock_check() pipeline against the local stand-in shop and
+reports per-step latency, checks per minute, peak memory and Chrome process count
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+from urllib.parse import urlparse
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCHMARK_DIR))
+
+from checker import AmulStockChecker, STEP_TIMEOUTS, build_chrome_options, launch_chrome
+from http_checker import AmulHttpChecker
+from history import StockHistory
+from notifier import NotificationDispatcher, NtfyChannel
+from resilience import CircuitBreaker
+from session_cache import SessionCache
+from standin_server import StandInShopServer, TRACKER_HOST
+from sampling import ProcessTreeSampler
+
+ENGINES = ("selenium", "selenium-lean", "http")
+RESULTS_DIR = os.path.join(BENCHMARK_DIR, "results")
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize(values):
+    return {
+        "count": len(values),
+        "p50": percentile(values, 50),
+        "p95": percentile(values, 95),
+    }
+
+
+class EngineRunner:
+    """Creates a fresh checker per check for one engine, as a cron run would"""
+
+    def __init__(self, engine, server, notifier, history, circuit, session_cache=None, headless=True):
+        self.engine = engine
+        self.server = server
+        self.notifier = notifier
+        self.history = history
+        self.circuit = circuit
+        self.session_cache = session_cache
+        self.headless = headless
+
+    def create_checker(self, timings):
+        if self.engine == "http":
+            return AmulHttpChecker(log_file=os.devnull, base_url=self.server.base_url,
+                                   notifier=self.notifier, history=self.history, circuit=self.circuit)
+
+        profile = "lean" if self.engine == "selenium-lean" else "standard"
+        chrome_options = build_chrome_options(self.headless, profile)
+        # Send the page's tracker requests to the stand-in instead of the internet
+        port = urlparse(self.server.base_url).port
+        chrome_options.add_argument(f"--host-resolver-rules=MAP {TRACKER_HOST} 127.0.0.1:{port}")
+
+        started = time.perf_counter()
+        driver = launch_chrome(self.headless, profile, chrome_options)
+        timings["driver_launch"] = round(time.perf_counter() - started, 3)
+
+        checker = AmulStockChecker(driver=driver, log_file=os.devnull, notifier=self.notifier,
+                                   history=self.history, use_session_cache=False, circuit=self.circuit)
+        checker.session_cache = self.session_cache
+        # The checker quits the browser in cleanup(), like one it launched itself
+        checker.attach_driver(driver, owned=True)
+        return checker
+
+    def run_check(self, case):
+        """Run one check and return (status, step timings)"""
+        timings = {}
+        checker = self.create_checker(timings)
+        checker.pincode = case["pincode"]
+        checker.product_url = f"{self.server.base_url}/en/product/{case['alias']}"
+
+        checker.run_stock_check()
+        timings.update(checker.step_timings)
+        status = checker.last_record["status"] if checker.last_record else "ERROR"
+        return status, timings
+
+
+def benchmark_engine(runner, cases, rounds):
+    """Run every case `rounds` times on one engine and summarize the results"""
+    steps = {}
+    variants = {}
+    mismatches = []
+    checks = 0
+
+    with ProcessTreeSampler() as sampler:
+        started = time.perf_counter()
+        for _ in range(rounds):
+            for case in cases:
+                check_started = time.perf_counter()
+                status, timings = runner.run_check(case)
+                elapsed = time.perf_counter() - check_started
+                checks += 1
+
+                for step, seconds in timings.items():
+                    steps.setdefault(step, []).append(seconds)
+                variants.setdefault(case["variant"], []).append(elapsed)
+                if status != case["status"]:
+                    mismatches.append({"alias": case["alias"], "pincode": case["pincode"],
+                                       "expected": case["status"], "got": status})
+        wall_time = time.perf_counter() - started
+
+    return {
+        "checks": checks,
+        "wall_time": round(wall_time, 3),
+        "checks_per_minute": round(checks / wall_time * 60, 1),
+        "peak_rss_mb": round(sampler.peak_rss_mb, 1),
+        "peak_chrome_processes": sampler.peak_chrome_processes,
+        "steps": {step: summarize(values) for step, values in steps.items()},
+        "variants": {variant: summarize(values) for variant, values in variants.items()},
+        "mismatches": mismatches,
+    }
+
+
+def print_results(results, baseline=None):
+    for engine, result in results["engines"].items():
+        if "skipped" in result:
+            print(f"\n⏭️  {engine}: skipped ({result['skipped']})")
+            continue
+
+        line = (f"\n⚙️  {engine}: {result['checks']} checks, {result['checks_per_minute']:.1f} checks/min, "
+                f"peak {result['peak_rss_mb']:.0f} MB, {result['peak_chrome_processes']} Chrome process(es)")
+        previous = (baseline or {}).get("engines", {}).get(engine, {})
+        if "checks_per_minute" in previous:
+            line += f" (was {previous['checks_per_minute']:.1f} checks/min)"
+        print(line)
+
+        for kind in ("steps", "variants"):
+            for name, summary in result[kind].items():
+                print(f"   {name:<16} p50 {summary['p50']:.3f}s  p95 {summary['p95']:.3f}s")
+        for mismatch in result["mismatches"]:
+            print(f"   ❌ {mismatch['alias']} @ {mismatch['pincode']}: expected {mismatch['expected']}, got {mismatch['got']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the stock check engines against the local stand-in shop')
+    parser.add_argument('--engines', nargs='+', choices=ENGINES, default=list(ENGINES), help='Engines to benchmark')
+    parser.add_argument('--rounds', type=int, default=3, help='Times every case is checked per engine')
+    parser.add_argument('--cases', type=str, default=os.path.join(BENCHMARK_DIR, 'cases.json'), help='Benchmark cases file')
+    parser.add_argument('--step-timeout', type=float, help='Override every Selenium step timeout (seconds)')
+    parser.add_argument('--session-cache', action='store_true', help='Selenium: reuse cached pincode sessions between checks')
+    parser.add_argument('--no-headless', action='store_true', help='Show the browser windows')
+    parser.add_argument('--verbose', action='store_true', help='Show the checkers\' log output')
+    parser.add_argument('--output', type=str, help=f'Results JSON file (default: a timestamped file in {RESULTS_DIR})')
+    parser.add_argument('--compare', type=str, help='Previous results JSON file to compare against')
+
+    args = parser.parse_args()
+
+    with open(args.cases, "r") as f:
+        cases = json.load(f)
+    if not args.verbose:
+        logging.disable(logging.WARNING)
+    if args.step_timeout:
+        for step in STEP_TIMEOUTS:
+            STEP_TIMEOUTS[step] = args.step_timeout
+
+    results = {
+        "started_at": datetime.now().isoformat(),
+        "rounds": args.rounds,
+        "cases": len(cases),
+        "engines": {},
+    }
+
+    with StandInShopServer() as server, tempfile.TemporaryDirectory() as tmp_dir:
+        notifier = NotificationDispatcher([NtfyChannel(server=f"{server.base_url}/ntfy")])
+        session_cache = SessionCache(os.path.join(tmp_dir, "session_cache.json")) if args.session_cache else None
+        # The stand-in's ERROR fixtures must not trip the working copy's circuit breaker
+        circuit = CircuitBreaker(os.path.join(tmp_dir, "circuit_breaker.json"))
+
+        for engine in args.engines:
+            print(f"🏁 Benchmarking {engine}...")
+            # A fresh history per engine so every engine sees the same transitions
+            history = StockHistory(":memory:")
+            runner = EngineRunner(engine, server, notifier, history, circuit, session_cache, not args.no_headless)
+            try:
+                results["engines"][engine] = benchmark_engine(runner, cases, args.rounds)
+            except (Exception, SystemExit) as e:
+                # e.g. no Chrome/ChromeDriver on this machine
+                results["engines"][engine] = {"skipped": (str(e).strip().splitlines() or [type(e).__name__])[0]}
+            finally:
+                history.close()
+
+        notifier.close()
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, "r") as f:
+            baseline = json.load(f)
+    print_results(results, baseline)
+
+    output = args.output or os.path.join(RESULTS_DIR, f"{datetime.now().strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"\n💾 Results saved to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,324 +3,456 @@ from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.keys import Keys
-from selenium.common.exceptions import TimeoutException, NoSuchElementException
+from selenium.common.exceptions import TimeoutException, NoSuchElementException, StaleElementReferenceException
 import time
-import sys
-import os
-import logging
-from datetime import datetime
-import argparse
 import json
-import requests
-from config import PRODUCT_URL, PINCODE, STATUS_FILE, NTFY_TOPIC
-from notifier import send_ntfy_notification
+from config import (
+    STEP_TIMEOUTS, DRIVER_PROFILE, LEAN_BLOCKED_URLS, PINCODE_STATE_COOKIES,
+    PINCODE_STATE_STORAGE_KEYS
+)
+from checker_base import StockCheckerBase
+from watchlist import group_by_pincode
+from timing import timed_step, format_timings
+from resilience import retry_step
+from extraction import StockResult, selectors, read_signals, extract_stock, format_votes
+from session_cache import SessionCache, cdp_cookie
+from metrics import DRIVER_LAUNCH
 
-class AmulStockChecker:
-    def __init__(self, headless=True, log_file=None):
-        """Initialize the web scraper with Chrome options"""
+
+# Reads the delivery-location localStorage keys of the current page
+READ_STORAGE_SCRIPT = """
+const items = {};
+for (const key of arguments[0]) {
+    const value = window.localStorage.getItem(key);
+    if (value !== null) items[key] = value;
+}
+return {origin: window.location.origin, items: items};
+"""
+# Runs before the shop's own scripts on every new document until removed
+RESTORE_STORAGE_SCRIPT = """
+(function (origin, items) {
+    if (window.location.origin !== origin) return;
+    for (const [key, value] of Object.entries(items)) window.localStorage.setItem(key, value);
+})(%s, %s);
+"""
+
+# Chrome features a stock check never needs
+LEAN_CHROME_ARGUMENTS = [
+    "--blink-settings=imagesEnabled=false",
+    "--disable-extensions",
+    "--disable-background-networking",
+    "--disable-component-update",
+    "--disable-default-apps",
+    "--disable-sync",
+    "--disable-notifications",
+    "--disable-features=Translate,MediaRouter,OptimizationHints,AutofillServerCommunication",
+    "--mute-audio",
+    "--no-first-run",
+]
+
+def build_chrome_options(headless, profile=DRIVER_PROFILE):
+    """Build the Chrome options used for every checker browser"""
+    chrome_options = Options()
+    if headless:
+        chrome_options.add_argument("--headless")
+    chrome_options.add_argument("--no-sandbox")
+    chrome_options.add_argument("--disable-dev-shm-usage")
+    chrome_options.add_argument("--disable-gpu")
+    chrome_options.add_argument("--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36")
+
+    if profile == "lean":
+        # driver.get() returns at DOMContentLoaded; every step waits for its own elements
+        chrome_options.page_load_strategy = "eager"
+        chrome_options.add_argument("--window-size=1280,800")
+        for argument in LEAN_CHROME_ARGUMENTS:
+            chrome_options.add_argument(argument)
+        chrome_options.add_experimental_option("prefs", {
+            "profile.managed_default_content_settings.images": 2,
+            "profile.default_content_setting_values.notifications": 2,
+        })
+    else:
+        chrome_options.add_argument("--window-size=1920,1080")
+    return chrome_options
+
+def launch_chrome(headless, profile=DRIVER_PROFILE, chrome_options=None):
+    """Start Chrome for the given profile; the lean profile also blocks media, fonts and trackers"""
+    started = time.perf_counter()
+    driver = webdriver.Chrome(options=chrome_options or build_chrome_options(headless, profile))
+    DRIVER_LAUNCH.observe(time.perf_counter() - started)
+    if profile == "lean":
+        try:
+            driver.execute_cdp_cmd("Network.enable", {})
+            driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": LEAN_BLOCKED_URLS})
+        except Exception:
+            driver.quit()
+            raise
+    return driver
+
+class AmulStockChecker(StockCheckerBase):
+    def __init__(self, headless=True, log_file=None, driver=None, notifier=None, history=None,
+                 record_results=True, profile=DRIVER_PROFILE, use_session_cache=True, circuit=None):
+        """Initialize the web scraper with Chrome options
+
+        Pass an existing driver (e.g. one leased from a DriverPool) to skip
+        launching Chrome, or an existing NotificationDispatcher / StockHistory /
+        CircuitBreaker to share them; borrowed resources are left running by cleanup().
+        With use_session_cache the delivery location selected for a pincode
+        is saved and restored on later checks instead of repeating the
+        pincode flow.
+        """
         self.setup_logging(log_file)
-        self.clean_cron_log_file()
-        self.setup_driver(headless)
-        self.wait = WebDriverWait(self.driver, 15)
-        self.pincode = PINCODE
+        if driver is None:
+            self.setup_driver(headless, profile)
+        else:
+            self.attach_driver(driver, owned=False)
+        self.setup_state(notifier, history, record_results, circuit)
+        self.session_cache = SessionCache() if use_session_cache else None
+        self.restored_state = None
 
-        self.product_url = PRODUCT_URL
-        # self.product_url = "https://shop.amul.com/en/product/amul-organic-bajra-flour-500-g"
-        self.status_file = STATUS_FILE
-        self.ntfy_topic = NTFY_TOPIC
-        self.ntfy_url = f"https://ntfy.sh/{self.ntfy_topic}"
-        
-    def setup_logging(self, log_file=None):
-        """Setup logging configuration"""
-        if log_file is None:
-            log_file = f"amul_stock_checker_{datetime.now().strftime('%Y%m%d')}.log"
-        
-        logging.basicConfig(
-            level=logging.INFO,
-            format='%(asctime)s - %(levelname)s - %(message)s',
-            handlers=[
-                logging.FileHandler(log_file),
-                logging.StreamHandler(sys.stdout)
-            ]
-        )
-        self.logger = logging.getLogger(__name__)
-        
-    def setup_driver(self, headless):
+    def setup_driver(self, headless, profile=DRIVER_PROFILE):
         """Setup Chrome driver with appropriate options"""
-        chrome_options = Options()
-        if headless:
-            chrome_options.add_argument("--headless")
-        chrome_options.add_argument("--no-sandbox")
-        chrome_options.add_argument("--disable-dev-shm-usage")
-        chrome_options.add_argument("--disable-gpu")
-        chrome_options.add_argument("--window-size=1920,1080")
-        chrome_options.add_argument("--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36")
-        
         try:
-            self.driver = webdriver.Chrome(options=chrome_options)
-            self.logger.info("✓ Chrome driver initialized successfully")
+            self.attach_driver(launch_chrome(headless, profile), owned=True)
+            self.logger.info(f"✓ Chrome driver initialized successfully ({profile} profile)")
         except Exception as e:
             self.logger.error(f"✗ Failed to initialize Chrome driver: {e}")
             self.logger.error("Make sure ChromeDriver is installed and in PATH")
-            sys.exit(1)
+            raise
+
+    def attach_driver(self, driver, owned):
+        """Use the given driver; owned drivers are quit by cleanup()"""
+        self.driver = driver
+        self.owns_driver = owned
+        self.pages_loaded = 0
+        self.restore_script_id = None
+        self.wait = WebDriverWait(self.driver, 15)
+
+    def step_wait(self, step):
+        """Return a WebDriverWait using the configured timeout for a pipeline step"""
+        return WebDriverWait(self.driver, STEP_TIMEOUTS[step])
+
+    def pincode_option_listed(self, driver):
+        """Wait condition: the dropdown option for our pincode is rendered and clickable"""
+        for item in driver.find_elements(By.CSS_SELECTOR, "a.searchitem-name"):
+            try:
+                if self.pincode in item.find_element(By.CSS_SELECTOR, "p.item-name").text \
+                        and item.is_displayed() and item.is_enabled():
+                    return item
+            except (NoSuchElementException, StaleElementReferenceException):
+                # The list is re-rendered while the search debounces
+                continue
+        return False
     
+    def restore_session(self):
+        """Load the cached delivery-location state for the pincode before the next page load
+
+        Cookies are set through the DevTools protocol (no page of the shop
+        needs to be open) and the localStorage keys are written by a script
+        that runs before the page's own. Returns True if a state was restored.
+        """
+        self.restored_state = None
+        state = self.session_cache.get(self.pincode) if self.session_cache else None
+        if state is None:
+            return False
+
+        try:
+            for cookie in state["cookies"]:
+                self.driver.execute_cdp_cmd("Network.setCookie", cdp_cookie(cookie))
+            if state["storage"]:
+                script = RESTORE_STORAGE_SCRIPT % (json.dumps(state["origin"]), json.dumps(state["storage"]))
+                self.restore_script_id = self.driver.execute_cdp_cmd(
+                    "Page.addScriptToEvaluateOnNewDocument", {"source": script}
+                )["identifier"]
+        except Exception as e:
+            self.logger.warning(f"⚠️ Could not restore cached session for pincode {self.pincode}: {e}")
+            self.remove_restore_script()
+            return False
+
+        self.restored_state = state
+        self.logger.info(f"♻️ Restored cached session for pincode {self.pincode}")
+        return True
+
+    def remove_restore_script(self):
+        """Stop writing the restored localStorage keys into new pages"""
+        if self.restore_script_id is None:
+            return
+        try:
+            self.driver.execute_cdp_cmd("Page.removeScriptToEvaluateOnNewDocument", {"identifier": self.restore_script_id})
+        except Exception as e:
+            self.logger.warning(f"⚠️ Could not remove session restore script: {e}")
+        self.restore_script_id = None
+
+    def restored_session_valid(self):
+        """Check the loaded page still carries the restored delivery-location state"""
+        cookies = {cookie["name"]: cookie["value"] for cookie in self.driver.get_cookies()}
+        if any(cookie["name"] not in cookies for cookie in self.restored_state["cookies"]):
+            return False
+        storage = self.driver.execute_script(READ_STORAGE_SCRIPT, list(PINCODE_STATE_STORAGE_KEYS))["items"]
+        return storage == self.restored_state["storage"]
+
+    def save_session(self):
+        """Cache the delivery-location state after the pincode was selected"""
+        if self.session_cache is None:
+            return
+        try:
+            cookies = [cookie for cookie in self.driver.get_cookies() if cookie["name"] in PINCODE_STATE_COOKIES]
+            storage = self.driver.execute_script(READ_STORAGE_SCRIPT, list(PINCODE_STATE_STORAGE_KEYS))
+            if cookies:
+                self.session_cache.save(self.pincode, storage["origin"], cookies, storage["items"])
+        except Exception as e:
+            self.logger.warning(f"⚠️ Could not cache session for pincode {self.pincode}: {e}")
+
+    def clear_session_state(self):
+        """Drop cookies and storage so the next page asks for a pincode again"""
+        self.remove_restore_script()
+        self.driver.delete_all_cookies()
+        try:
+            self.driver.execute_script("window.localStorage.clear(); window.sessionStorage.clear();")
+        except Exception:
+            # Pages without web storage (about:blank, error pages)
+            pass
+
+    def select_pincode(self):
+        """Make sure the loaded page has the pincode selected
+
+        A restored session is used if the page accepted it; a stale one is
+        dropped and the full pincode flow runs on a reloaded page instead.
+        """
+        self.remove_restore_script()
+        if self.restored_state is not None:
+            if self.restored_session_valid():
+                self.logger.info("✓ Cached session accepted - skipping the pincode flow")
+                self.restored_state = None
+                return True
+            self.logger.warning(f"⚠️ Cached session for pincode {self.pincode} is stale - selecting it again")
+            self.restored_state = None
+            self.session_cache.invalidate(self.pincode)
+            self.clear_session_state()
+            if not self.navigate_to_product():
+                return False
+
+        if not (self.handle_pincode_popup() and self.select_pincode_from_dropdown()):
+            return False
+        self.save_session()
+        return True
+
+    @timed_step("navigate")
+    @retry_step("navigate")
     def navigate_to_product(self):
         """Navigate to the product page"""
         try:
             self.logger.info(f"🌐 Navigating to: {self.product_url}")
+            self.throttle()
             self.driver.get(self.product_url)
+            self.pages_loaded += 1
             
             # Wait for page to load
-            self.wait.until(EC.presence_of_element_located((By.ID, "search")))
+            self.step_wait("navigate").until(EC.presence_of_element_located((By.ID, "search")))
             self.logger.info("✓ Product page loaded successfully")
             return True
             
-        except TimeoutException:
-            self.logger.error("✗ Failed to load product page - timeout")
+        except TimeoutException as e:
+            self.logger.error(f"✗ Failed to load product page - timeout ({self.note_failure(e, 'navigate')})")
             return False
         except Exception as e:
-            self.logger.error(f"✗ Error navigating to product: {e}")
+            self.logger.error(f"✗ Error navigating to product ({self.note_failure(e, 'navigate')}): {e}")
             return False
     
+    @timed_step("pincode_entry")
+    @retry_step("pincode_entry")
     def handle_pincode_popup(self):
         """Handle the pincode popup and enter the pincode"""
         try:
             self.logger.info("🔍 Looking for pincode input popup...")
             
-            # Wait for the pincode input to appear
-            # pincode_input = self.wait.until(
-            #     EC.element_to_be_clickable((By.ID, "search"))
-            # )
-            for _ in range(10):
-                try:
-                    pincode_input = self.driver.find_element(By.ID, "search")
-                    if pincode_input.is_displayed() and pincode_input.is_enabled():
-                        break
-                except:
-                    pass
-                time.sleep(1)
-            else:
-                self.logger.error("✗ Pincode input field not interactable after retries")
-                return False
+            # Wait for the pincode input to become interactable
+            pincode_input = self.step_wait("pincode_entry").until(
+                EC.element_to_be_clickable((By.ID, "search"))
+            )
 
             self.logger.info("✓ Found pincode input field")
             
-            # Clear and enter pincode
+            # Clear and enter pincode; the dropdown step waits for the search results
             pincode_input.clear()
             pincode_input.send_keys(self.pincode)
             self.logger.info(f"✓ Entered pincode: {self.pincode}")
             
-            # Wait for debouncing to complete
-            self.logger.info("⏳ Waiting for search results (debouncing)...")
-            time.sleep(2)
-            
             return True
             
-        except TimeoutException:
-            self.logger.error("✗ Pincode input field not found - timeout")
+        except TimeoutException as e:
+            self.logger.error(f"✗ Pincode input field not interactable - timeout ({self.note_failure(e, 'pincode_entry')})")
             return False
         except Exception as e:
-            self.logger.error(f"✗ Error handling pincode popup: {e}")
+            self.logger.error(f"✗ Error handling pincode popup ({self.note_failure(e, 'pincode_entry')}): {e}")
             return False
     
+    @timed_step("dropdown_select")
+    @retry_step("dropdown_select")
     def select_pincode_from_dropdown(self):
         """Select the pincode from the dropdown results"""
         try:
             self.logger.info("🔍 Looking for pincode in dropdown...")
+            wait = self.step_wait("dropdown_select")
             
-            # Wait for the dropdown item to appear and be clickable
-            dropdown_item = self.wait.until(
-                EC.element_to_be_clickable((By.CSS_SELECTOR, "a.searchitem-name"))
-            )
-            
-            # Verify it contains our pincode
+            # Wait for the debounced search to list our pincode
+            dropdown_item = wait.until(self.pincode_option_listed)
             pincode_text = dropdown_item.find_element(By.CSS_SELECTOR, "p.item-name").text
-            if self.pincode in pincode_text:
-                self.logger.info(f"✓ Found pincode option: {pincode_text}")
-                dropdown_item.click()
-                self.logger.info("✓ Clicked on pincode option")
-                return True
-            else:
-                self.logger.error(f"✗ Expected pincode {self.pincode} but found {pincode_text}")
-                return False
+            self.logger.info(f"✓ Found pincode option: {pincode_text}")
+
+            url_before = self.driver.current_url
+            dropdown_item.click()
+            self.logger.info("✓ Clicked on pincode option")
+
+            # Selecting a pincode switches the substore: the URL changes or the
+            # dropdown is torn down while the page re-renders
+            try:
+                wait.until(EC.any_of(EC.url_changes(url_before), EC.staleness_of(dropdown_item)))
+            except TimeoutException:
+                self.logger.warning("⚠️ No substore change detected after selecting the pincode")
+            return True
                 
-        except TimeoutException:
-            self.logger.error("✗ Pincode dropdown option not found - timeout")
+        except TimeoutException as e:
+            self.logger.error(f"✗ Pincode {self.pincode} not found in dropdown - timeout ({self.note_failure(e, 'dropdown_select')})")
             return False
         except Exception as e:
-            self.logger.error(f"✗ Error selecting pincode from dropdown: {e}")
+            self.logger.error(f"✗ Error selecting pincode from dropdown ({self.note_failure(e, 'dropdown_select')}): {e}")
             return False
     
+    @timed_step("stock_read")
+    @retry_step("stock_read")
     def check_stock_status(self):
-        """Check if the product is in stock or sold out based on the sold out div"""
+        """Read the page's signals into a StockResult (see extraction.extract_stock)"""
         try:
-            self.logger.info("⏳ Waiting for new page to load...")
-            
-            # Wait a bit for page transition
-            time.sleep(3)
-            
-            # Wait for the page content to load properly
-            self.wait.until(EC.presence_of_element_located((By.TAG_NAME, "body")))
+            self.logger.info("⏳ Waiting for stock information to render...")
+            page_selectors = selectors()
             
-            # Check specifically for the sold out div
+            # Wait until either the sold out alert or the add to cart button is rendered
             try:
-                sold_out_div = self.driver.find_element(
-                    By.CSS_SELECTOR, "div.alert.alert-danger.mt-3"
-                )
-                
-                # Verify the div contains "Sold Out" text
-                if sold_out_div.is_displayed() and "Sold Out" in sold_out_div.text:
-                    self.logger.info("❌ Product Status: SOLD OUT")
-                    self.logger.info(f"Found sold out div: {sold_out_div.text.strip()}")
-                    return "SOLD_OUT"
-                    
-            except NoSuchElementException:
-                # If the sold out div is not found, product is in stock
-                self.logger.info("✅ Product Status: IN STOCK")
-                self.logger.info("Sold out div not found - product is available")
-
-                # Fix: Get the text from the WebElement first
-                product_name_element = self.driver.find_element(By.CLASS_NAME, "product-name")
-                product_name_string = product_name_element.text  # Get the text content
-                
-                # Now you can use string methods
-                if "," in product_name_string:
-                    product_name = product_name_string[:product_name_string.index(",")]
-                else:
-                    product_name = product_name_string  # Use full text if no comma found
-                
-                # Send notification for stock availability
-                send_ntfy_notification(
-                    logger=self.logger,
-                    ntfy_url=self.ntfy_url,
-                    message=f"🚨 {product_name} is IN STOCK! Check now: {self.product_url}",
-                    ntfy_topic=self.ntfy_topic
-                )
-                return "IN_STOCK"
+                self.step_wait("stock_read").until(EC.any_of(
+                    EC.visibility_of_element_located((By.CSS_SELECTOR, page_selectors["sold_out_alert"])),
+                    EC.presence_of_element_located((By.CSS_SELECTOR, page_selectors["add_to_cart"]))
+                ))
+            except TimeoutException:
+                self.logger.warning("⚠️ Neither sold out alert nor add to cart button rendered - reading page as is")
             
-            # If we found the div but it doesn't contain "Sold Out", check its content
-            if sold_out_div:
-                self.logger.warning(f"⚠️ Found alert div but unexpected content: {sold_out_div.text.strip()}")
-                return "UNKNOWN"
+            # All signals in one script call
+            signals = read_signals(self.driver)
+            result, votes = extract_stock(signals)
+            self.product_name = result.product_name
+            self.logger.info(f"🔎 Signals: {format_votes(votes) or 'none rendered'}")
+
+            if result.status == "IN_STOCK":
+                self.logger.info(f"✅ Product Status: IN STOCK (confidence {result.confidence:.2f})")
+            elif result.status == "SOLD_OUT":
+                self.logger.info(f"❌ Product Status: SOLD OUT (confidence {result.confidence:.2f})")
+            else:
+                alert_text = (signals.get("alert") or {}).get("text")
+                self.logger.warning(f"⚠️ Stock status unclear (confidence {result.confidence:.2f})"
+                                    + (f": {alert_text}" if alert_text else ""))
+            return result
                 
-        except TimeoutException:
-            self.logger.error("✗ Page failed to load properly - timeout")
-            return "ERROR"
-        except Exception as e:
-            self.logger.error(f"✗ Error checking stock status: {e}")
-            return "ERROR"
-    
-    def save_status(self, status):
-        """Save the current stock status to a JSON file"""
-        try:
-            status_data = {
-                "timestamp": datetime.now().isoformat(),
-                "status": status,
-                "pincode": self.pincode,
-                "product_url": self.product_url
-            }
-            
-            with open(self.status_file, "w") as f:
-                json.dump(status_data, f, indent=2)
-            
-            self.logger.info(f"💾 Status saved to {self.status_file}")
-            
+        except TimeoutException as e:
+            self.logger.error(f"✗ Page failed to load properly - timeout ({self.note_failure(e, 'stock_read')})")
+            return StockResult("ERROR")
         except Exception as e:
-            self.logger.error(f"✗ Error saving status: {e}")
-    
-    def load_previous_status(self):
-        """Load the previous stock status from JSON file"""
-        try:
-            if os.path.exists(self.status_file):
-                with open(self.status_file, "r") as f:
-                    return json.load(f)
-            return None
-        except Exception as e:
-            self.logger.error(f"✗ Error loading previous status: {e}")
-            return None
-    
-    def send_notification(self, status, previous_status=None):
-        """Send notification if status changed from SOLD_OUT to IN_STOCK"""
-        if previous_status and previous_status.get("status") == "SOLD_OUT" and status == "IN_STOCK":
-            self.logger.info("🚨 STOCK ALERT: Product is now IN STOCK! 🚨")
-            # Here you can add email, SMS, or other notification methods
-            # For example, you could integrate with Twilio, SendGrid, etc.
-            
-            # Simple desktop notification (works on Linux/macOS)
-            try:
-                os.system(f'notify-send "Amul Stock Alert" "Product is now IN STOCK for pincode {self.pincode}!"')
-            except:
-                pass
-        elif status != previous_status.get("status") if previous_status else None:
-            self.logger.info(f"📊 Status changed from {previous_status.get('status') if previous_status else 'N/A'} to {status}")
+            self.logger.error(f"✗ Error checking stock status ({self.note_failure(e, 'stock_read')}): {e}")
+            return StockResult("ERROR")
     
     def run_stock_check(self):
         """Run the complete stock checking process"""
         self.logger.info("🚀 Starting Amul Product Stock Check")
         self.logger.info("=" * 50)
         
-        # Load previous status for comparison
-        previous_status = self.load_previous_status()
+        self.step_timings = {}
+        self.product_name = None
+        self.failure = None
         
         try:
-            # Step 1: Navigate to product page
+            # Step 1: Navigate to product page, with the cached session for the pincode if any
+            self.restore_session()
             if not self.navigate_to_product():
+                self.record_result("ERROR")
                 return False
             
-            # Step 2: Handle pincode popup
-            if not self.handle_pincode_popup():
-                return False
-            
-            # Step 3: Select pincode from dropdown
-            if not self.select_pincode_from_dropdown():
+            # Steps 2-3: Handle pincode popup and select pincode from dropdown,
+            # unless the restored session already has it selected
+            if not self.select_pincode():
+                self.record_result("ERROR")
                 return False
             
             # Step 4: Check stock status
-            status = self.check_stock_status()
+            result = self.check_stock_status()
             
             # Step 5: Save status and send notifications
-            # self.save_status(status)
-            # self.send_notification(status, previous_status)
+            self.record_result(result)
             
             self.logger.info("=" * 50)
-            self.logger.info(f"🎯 FINAL RESULT: {status}")
+            self.logger.info(f"🎯 FINAL RESULT: {result.status}")
             
-            return status != "ERROR"
+            return result.status != "ERROR"
             
         except Exception as e:
-            self.logger.error(f"✗ Unexpected error during stock check: {e}")
+            self.logger.error(f"✗ Unexpected error during stock check ({self.note_failure(e, None)}): {e}")
             return False
         
         finally:
+            self.logger.info(f"⏱️ Step timings: {format_timings(self.step_timings)}", extra={"timings": self.step_timings})
             self.cleanup()
     
-    def cleanup(self):
-        """Clean up resources"""
-        try:
-            self.driver.quit()
-            print("🧹 Browser closed successfully \n\n")
-        except Exception as e:
-            print(f"⚠️ Error during cleanup: {e}")
+    def check_batch(self, pairs):
+        """Check every (product_url, pincode) pair, setting each pincode only once
+
+        The pincode is selected on the first product page of each group that
+        loads; the remaining products for that pincode reuse the same session.
+        Returns one status record per pair.
+        """
+        results = []
+
+        for pincode, product_urls in group_by_pincode(pairs).items():
+            self.pincode = pincode
+            self.logger.info(f"📍 Checking {len(product_urls)} product(s) for pincode: {pincode}")
+
+            # A pincode already selected in this session (e.g. by the previous
+            # daemon cycle) is kept; otherwise start clean so the popup shows
+            # again, or from the cached session for the pincode
+            pincode_selected = pincode == self.selected_pincode
+            if not pincode_selected:
+                self.clear_session_state()
+                self.selected_pincode = None
+                self.restore_session()
+
+            for product_url in product_urls:
+                self.product_url = product_url
+                self.product_name = None
+                self.step_timings = {}
+                self.failure = None
+
+                if not self.navigate_to_product():
+                    result = StockResult("ERROR")
+                elif not pincode_selected and not self.select_pincode():
+                    result = StockResult("ERROR")
+                else:
+                    pincode_selected = True
+                    self.selected_pincode = pincode
+                    result = self.check_stock_status()
+                status = result.status
+
+                self.logger.info(f"🎯 {product_url} @ {pincode}: {status} ({format_timings(self.step_timings)})",
+                                 extra={"product_url": product_url, "pincode": pincode, "status": status,
+                                        "timings": self.step_timings})
+                results.append(self.record_result(result))
+
+        return results
 
     def cleanup(self):
         """Clean up resources"""
+        self.close_shared()
+        if not self.owns_driver:
+            self.remove_restore_script()
+            # Borrowed drivers go back to their pool instead of being quit
+            return
         try:
             self.driver.quit()
             self.logger.info("🧹 Browser closed successfully \n\n")
         except Exception as e:
             self.logger.error(f"⚠️ Error during cleanup: {e}")
-
-    def clean_cron_log_file(self):
-        """Clean the cron log file if it exceeds size of 500Kbs """
-        # Log file path --> log/amul-log.log
-        log_file_path = os.path.join(os.path.dirname(__file__), 'log', 'amul-log.log')
-        if os.path.exists(log_file_path) and os.path.getsize(log_file_path) > 500 * 1024:
-            try:
-                with open(log_file_path, 'w') as log_file:
-                    log_file.write("")  # Clear the file content
-                self.logger.info("🗑️ Cron log file cleaned successfully")
-            except Exception as e:
-                self.logger.error(f"⚠️ Error cleaning cron log file: {e}")
-        else:
-            self.logger.info("🗑️ Cron log file size is within limits, no cleaning needed")
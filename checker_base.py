@@ -0,0 +1,210 @@
+# checker_base.py
+import logging
+from datetime import datetime
+from urllib.parse import urlparse
+from config import PRODUCT_URL, PINCODE, RETRY_ATTEMPTS, PRICE_DROP_ALERT_PERCENT
+from extraction import StockResult, format_price
+from history import StockHistory, STOCK_STATUSES
+from notifier import NotificationDispatcher, build_channels
+from logging_config import configure_logging
+from metrics import observe_record
+from resilience import CircuitBreaker, classify_failure, product_host
+
+
+def product_alias(product_url):
+    """Return the product alias (last path segment) of a shop product URL"""
+    return urlparse(product_url).path.rstrip("/").rsplit("/", 1)[-1]
+
+
+def error_record(product_url, pincode, failure="unknown"):
+    """Build an ERROR status record for a check that could not run"""
+    return {
+        "timestamp": datetime.now().isoformat(),
+        **StockResult("ERROR").as_record(),
+        "pincode": pincode,
+        "product_url": product_url,
+        "failure": failure,
+        "timings": {}
+    }
+
+
+class StockCheckerBase:
+    """Engine-independent parts of a stock checker
+
+    Subclasses implement check_batch(), run_stock_check() and cleanup();
+    this class handles logging, the history store, restock and price drop
+    notifications, failure causes, the shop host's circuit breaker and
+    batch runs.
+    """
+
+    def setup_logging(self, log_file=None):
+        """Setup logging configuration (unless main() already did)"""
+        configure_logging(log_file)
+        self.logger = logging.getLogger(self.__module__)
+
+    def setup_state(self, notifier=None, history=None, record_results=True, circuit=None):
+        """Set the per-check state and the (possibly shared) notifier, history store and circuit breaker
+
+        With record_results=False (e.g. in a worker process) results are only
+        returned; whoever collects them stores them and sends notifications.
+        """
+        self.pincode = PINCODE
+        self.product_url = PRODUCT_URL
+        self.product_name = None
+        self.selected_pincode = None
+        self.step_timings = {}
+        self.last_record = None
+        self.rate_limiter = None
+        self.failure = None
+        self.retry_attempts = RETRY_ATTEMPTS
+        self.price_drop_percent = PRICE_DROP_ALERT_PERCENT
+
+        self.record_results = record_results
+        self.owns_notifier = record_results and notifier is None
+        self.notifier = notifier or (NotificationDispatcher(build_channels(), logger=self.logger) if record_results else None)
+        self.owns_history = record_results and history is None
+        self.history = history or (StockHistory() if record_results else None)
+        self.circuit = circuit or (CircuitBreaker() if record_results else None)
+
+    def throttle(self):
+        """Wait for the shared rate limiter (if any) before a request to the shop"""
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire()
+
+    def note_failure(self, exc, step):
+        """Remember why the current step failed (see resilience.classify_failure)"""
+        self.failure = classify_failure(exc, step)
+        return self.failure
+
+    def build_status_record(self, result):
+        """Build the status record for the current product and pincode from a StockResult (or a bare status)"""
+        if not isinstance(result, StockResult):
+            result = StockResult(result, product_name=self.product_name)
+        return {
+            "timestamp": datetime.now().isoformat(),
+            **result.as_record(),
+            "pincode": self.pincode,
+            "product_url": self.product_url,
+            "failure": (self.failure or "unknown") if result.status == "ERROR" else None,
+            "timings": dict(self.step_timings)
+        }
+
+    def save_status(self, record):
+        """Append a status record to the history store; returns the previous stock status and price"""
+        try:
+            previous_status, changed, previous_price = self.history.record(
+                record["product_url"], record["pincode"], record["status"],
+                price=record.get("price"), mrp=record.get("mrp"), max_quantity=record.get("max_quantity"),
+                variant=record.get("variant")
+            )
+            return previous_status, previous_price
+        except Exception as e:
+            self.logger.error(f"✗ Error saving status: {e}")
+            return None, None
+
+    def send_notification(self, record, previous_status=None):
+        """Send notification if the product has just come (back) in stock"""
+        status = record["status"]
+        if status == "IN_STOCK" and previous_status != "IN_STOCK":
+            self.logger.info("🚨 STOCK ALERT: Product is now IN STOCK! 🚨")
+            product_name = record.get("product_name") or product_alias(record["product_url"])
+            self.notifier.notify(
+                title="Amul Stock Alert",
+                message=f"🚨 {product_name} is IN STOCK! Check now: {record['product_url']}",
+                product_url=record["product_url"],
+                pincode=record["pincode"],
+                status=status
+            )
+        elif status in STOCK_STATUSES and status != previous_status:
+            self.logger.info(f"📊 Status changed from {previous_status or 'N/A'} to {status}")
+
+    def send_price_drop(self, record, previous_price):
+        """Send a notification if the price fell by at least price_drop_percent since the last reading"""
+        price = record.get("price")
+        if self.price_drop_percent is None or price is None or not previous_price or price >= previous_price:
+            return
+        drop = (previous_price - price) / previous_price * 100
+        if drop < self.price_drop_percent:
+            return
+        product_name = record.get("product_name") or product_alias(record["product_url"])
+        self.logger.info(f"💸 PRICE DROP: {format_price(previous_price)} → {format_price(price)} ({drop:.0f}% off)")
+        self.notifier.notify(
+            title="Amul Price Drop",
+            message=f"💸 {product_name} is down {drop:.0f}% to {format_price(price)} "
+                    f"(was {format_price(previous_price)}): {record['product_url']}",
+            product_url=record["product_url"],
+            pincode=record["pincode"],
+            status="PRICE_DROP"
+        )
+
+    def update_circuit(self, record):
+        """Count the result against the shop host's circuit breaker; alert once when it opens and when it recovers"""
+        try:
+            transition = self.circuit.record(record["product_url"], record["status"], record.get("failure"))
+        except Exception as e:
+            self.logger.error(f"✗ Error updating circuit breaker: {e}")
+            return
+        host = product_host(record["product_url"])
+        if transition == "opened":
+            minutes = round(self.circuit.reset_after / 60)
+            self.logger.error(f"🔌 Circuit for {host} opened after {self.circuit.threshold} failed checks "
+                              f"({record['failure']}) - pausing its checks")
+            self.notifier.notify(
+                title="Amul Stock Checker Degraded",
+                message=f"⚠️ Checks of {host} keep failing ({record['failure']}); "
+                        f"pausing them and retrying every {minutes} min",
+                host=host,
+                status="DEGRADED"
+            )
+        elif transition == "closed":
+            self.logger.info(f"🔌 Circuit for {host} closed - checks are back to normal")
+            self.notifier.notify(
+                title="Amul Stock Checker Recovered",
+                message=f"✅ Checks of {host} are working again",
+                host=host,
+                status="RECOVERED"
+            )
+
+    def store_result(self, record):
+        """Save a status record and notify on a restock or a change of the circuit breaker"""
+        observe_record(record)
+        previous_status, previous_price = self.save_status(record)
+        self.send_notification(record, previous_status)
+        self.send_price_drop(record, previous_price)
+        self.update_circuit(record)
+        return record
+
+    def record_result(self, result):
+        """Build the status record for the current check, storing it if this checker records results"""
+        record = self.build_status_record(result)
+        self.last_record = record
+        return self.store_result(record) if self.record_results else record
+
+    def run_batch_check(self, pairs):
+        """Run a batch check over the watchlist pairs in a single session"""
+        self.logger.info(f"🚀 Starting Amul Batch Stock Check ({len(pairs)} checks)")
+        self.logger.info("=" * 50)
+
+        try:
+            results = self.check_batch(pairs)
+
+            self.logger.info("=" * 50)
+            for record in results:
+                self.logger.info(f"🎯 {record['status']:<8} {record['pincode']} {record['product_url']}")
+
+            return all(record["status"] != "ERROR" for record in results)
+
+        except Exception as e:
+            self.logger.error(f"✗ Unexpected error during batch check: {e}")
+            return False
+
+        finally:
+            self.cleanup()
+
+    def close_shared(self):
+        """Close the notifier and history store if this checker created them"""
+        if self.owns_notifier:
+            # Waits for queued notifications to be delivered
+            self.notifier.close()
+        if self.owns_history:
+            self.history.close()
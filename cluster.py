@@ -0,0 +1,342 @@
+# cluster.py
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+from checker_base import StockCheckerBase, error_record
+from daemon import EntrySchedule, StoppableLoop, WarmCheckerLoop
+from config import (
+    CLUSTER_QUEUE_DB, CLUSTER_LEASE_SECONDS, CLUSTER_HEARTBEAT_SECONDS, CLUSTER_BATCH_SIZE,
+    CLUSTER_MAX_ATTEMPTS, CLUSTER_POLL_INTERVAL, DAEMON_INTERVAL, DAEMON_JITTER
+)
+
+QUEUE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS shards (
+    id INTEGER PRIMARY KEY,
+    product_url TEXT NOT NULL,
+    pincode TEXT NOT NULL,
+    worker TEXT,
+    lease_until REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    enqueued_at REAL NOT NULL,
+    UNIQUE (product_url, pincode)
+);
+CREATE INDEX IF NOT EXISTS shards_lease ON shards (lease_until);
+CREATE TABLE IF NOT EXISTS results (
+    id INTEGER PRIMARY KEY,
+    worker TEXT NOT NULL,
+    record TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS workers (
+    id TEXT PRIMARY KEY,
+    started_at REAL NOT NULL,
+    last_seen REAL NOT NULL,
+    checks INTEGER NOT NULL DEFAULT 0
+);
+"""
+
+
+def default_worker_id():
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+class WorkQueue:
+    """Shared queue of (product, pincode) shards and their results, stored in SQLite
+
+    Put the file on a disk every node can reach. A shard is leased to one
+    worker at a time; the worker extends its leases with heartbeats, and a
+    lease that runs out (the worker crashed or hung) makes the shard
+    claimable again. A result is only accepted from the worker holding the
+    shard's lease, so every lease yields at most one result.
+    """
+
+    def __init__(self, path=CLUSTER_QUEUE_DB, lease_seconds=CLUSTER_LEASE_SECONDS):
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        # Rollback journal rather than WAL: WAL needs shared memory, which
+        # network filesystems do not provide
+        self.conn.execute("PRAGMA journal_mode=DELETE")
+        self.conn.executescript(QUEUE_SCHEMA)
+
+    def transaction(self, work):
+        """Run work() in a write transaction and return its result"""
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                result = work()
+                self.conn.execute("COMMIT")
+                return result
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+
+    def enqueue(self, pairs):
+        """Queue the pairs that are not queued or leased already; returns how many were added"""
+        now = time.time()
+
+        def work():
+            added = 0
+            for product_url, pincode in pairs:
+                added += self.conn.execute(
+                    "INSERT OR IGNORE INTO shards (product_url, pincode, enqueued_at) VALUES (?, ?, ?)",
+                    (product_url, pincode, now)
+                ).rowcount
+            return added
+        return self.transaction(work)
+
+    def claim(self, worker, limit=CLUSTER_BATCH_SIZE, max_attempts=CLUSTER_MAX_ATTEMPTS):
+        """Lease up to limit free shards of one pincode (the oldest one's) to the worker
+
+        Returns [(shard_id, product_url, pincode), ...]. Shards of the same
+        pincode are claimed together so the worker selects the pincode once.
+        """
+        now = time.time()
+        free = "(lease_until IS NULL OR lease_until < ?) AND attempts < ?"
+
+        def work():
+            row = self.conn.execute(
+                f"SELECT pincode FROM shards WHERE {free} ORDER BY enqueued_at, id LIMIT 1", (now, max_attempts)
+            ).fetchone()
+            if row is None:
+                return []
+            shards = self.conn.execute(
+                f"SELECT id, product_url, pincode FROM shards WHERE {free} AND pincode = ? "
+                f"ORDER BY enqueued_at, id LIMIT ?",
+                (now, max_attempts, row[0], limit)
+            ).fetchall()
+            self.conn.executemany(
+                "UPDATE shards SET worker = ?, lease_until = ?, attempts = attempts + 1 WHERE id = ?",
+                [(worker, now + self.lease_seconds, shard_id) for shard_id, _, _ in shards]
+            )
+            return shards
+        return self.transaction(work)
+
+    def heartbeat(self, worker):
+        """Extend the worker's leases and mark it alive"""
+        now = time.time()
+
+        def work():
+            self.conn.execute(
+                "UPDATE shards SET lease_until = ? WHERE worker = ?", (now + self.lease_seconds, worker)
+            )
+            self.conn.execute(
+                """INSERT INTO workers (id, started_at, last_seen) VALUES (?, ?, ?)
+                   ON CONFLICT (id) DO UPDATE SET last_seen = excluded.last_seen""",
+                (worker, now, now)
+            )
+        self.transaction(work)
+
+    def complete(self, worker, shard_id, record):
+        """Store the shard's result and remove it from the queue, if the worker still holds its lease
+
+        Returns False (dropping the result) if the lease ran out and the
+        shard was claimed by another worker or given up meanwhile.
+        """
+        def work():
+            held = self.conn.execute(
+                "DELETE FROM shards WHERE id = ? AND worker = ?", (shard_id, worker)
+            ).rowcount
+            if held:
+                self.conn.execute("INSERT INTO results (worker, record) VALUES (?, ?)", (worker, json.dumps(record)))
+                self.conn.execute("UPDATE workers SET checks = checks + 1 WHERE id = ?", (worker,))
+            return bool(held)
+        return self.transaction(work)
+
+    def release(self, worker):
+        """Give up the worker's leases (e.g. on shutdown) so other workers can claim them at once"""
+        def work():
+            self.conn.execute("UPDATE shards SET worker = NULL, lease_until = NULL WHERE worker = ?", (worker,))
+            self.conn.execute("DELETE FROM workers WHERE id = ?", (worker,))
+        self.transaction(work)
+
+    def take_results(self, limit=500):
+        """Remove and return up to limit reported result records, oldest first"""
+        def work():
+            rows = self.conn.execute("SELECT id, record FROM results ORDER BY id LIMIT ?", (limit,)).fetchall()
+            if rows:
+                self.conn.execute("DELETE FROM results WHERE id <= ?", (rows[-1][0],))
+            return [json.loads(record) for _, record in rows]
+        return self.transaction(work)
+
+    def take_abandoned(self, max_attempts=CLUSTER_MAX_ATTEMPTS):
+        """Remove and return the (product_url, pincode) of shards whose every lease ran out"""
+        def work():
+            rows = self.conn.execute(
+                "SELECT id, product_url, pincode FROM shards "
+                "WHERE attempts >= ? AND (lease_until IS NULL OR lease_until < ?)",
+                (max_attempts, time.time())
+            ).fetchall()
+            self.conn.executemany("DELETE FROM shards WHERE id = ?", [(row[0],) for row in rows])
+            return [(product_url, pincode) for _, product_url, pincode in rows]
+        return self.transaction(work)
+
+    def stats(self):
+        """Return counts of queued and leased shards and of workers seen within a lease period"""
+        now = time.time()
+        with self.lock:
+            queued, leased = self.conn.execute(
+                "SELECT COALESCE(SUM(lease_until IS NULL OR lease_until < ?), 0), "
+                "COALESCE(SUM(lease_until >= ?), 0) FROM shards",
+                (now, now)
+            ).fetchone()
+            workers = self.conn.execute(
+                "SELECT COUNT(*) FROM workers WHERE last_seen >= ?", (now - self.lease_seconds,)
+            ).fetchone()[0]
+        return {"queued": queued, "leased": leased, "workers": workers}
+
+    def close(self):
+        self.conn.close()
+
+
+class ClusterCoordinator(StockCheckerBase, StoppableLoop):
+    """Queues due watchlist entries for the workers and stores the results they report
+
+    Entries are scheduled like StockDaemon's (the same EntrySchedule, so
+    an optional policy such as AdaptiveScheduler applies here too), but the
+    checks run on whichever workers claim them. The coordinator is
+    the single history and notification sink: results are stored one by
+    one, so a restock reported by two workers is only a transition (and an
+    alert) the first time.
+    """
+
+    stop_message = "stopping coordinator"
+
+    def __init__(self, queue, entries, interval=DAEMON_INTERVAL, jitter=DAEMON_JITTER, policy=None, log_file=None,
+                 notifier=None, history=None):
+        StoppableLoop.__init__(self)
+        self.setup_logging(log_file)
+        self.setup_state(notifier, history)
+        self.queue = queue
+        self.entries = entries
+        self.schedule = EntrySchedule(entries, interval, jitter, policy)
+
+    def enqueue_due(self):
+        """Queue every due entry whose host's circuit is not open and reschedule it"""
+        due = self.schedule.pop_due()
+        if not due:
+            return
+
+        pairs = self.circuit.allowed_pairs([(entry["product_url"], entry["pincode"]) for _, _, entry in due])
+        added = self.queue.enqueue(pairs) if pairs else 0
+        stats = self.queue.stats()
+        self.logger.info(f"📤 Queued {added} shard(s) ({len(pairs) - added} still pending); "
+                         f"{stats['queued']} queued, {stats['leased']} leased, {stats['workers']} worker(s) alive")
+        self.schedule.reschedule(due)
+
+    def collect_results(self):
+        """Store the results the workers reported, and ERROR results for abandoned shards"""
+        records = self.queue.take_results()
+        for product_url, pincode in self.queue.take_abandoned():
+            self.logger.error(f"✗ {product_url} @ {pincode}: no worker finished it after "
+                              f"{CLUSTER_MAX_ATTEMPTS} lease(s)")
+            records.append(error_record(product_url, pincode))
+
+        for record in records:
+            self.logger.info(f"🎯 {record['product_url']} @ {record['pincode']}: {record['status']}",
+                             extra={"product_url": record["product_url"], "pincode": record["pincode"],
+                                    "status": record["status"], "timings": record.get("timings")})
+            self.store_result(record)
+        if records:
+            self.notifier.flush()
+
+    def run(self):
+        """Queue and collect checks until SIGTERM/SIGINT"""
+        self.handle_signals()
+        self.logger.info(f"🛰️ Coordinator started: {len(self.entries)} check(s), queue {self.queue.path}")
+
+        try:
+            while not self.stop_event.is_set():
+                self.enqueue_due()
+                self.collect_results()
+                self.stop_event.wait(CLUSTER_POLL_INTERVAL)
+            self.collect_results()
+        finally:
+            self.cleanup()
+
+    def cleanup(self):
+        self.close_shared()
+        self.queue.close()
+        self.logger.info("👋 Coordinator stopped")
+
+
+class ClusterWorker(WarmCheckerLoop):
+    """Claims shards from the queue, checks them on one warm checker and reports the results
+
+    checker_factory() must return a checker created with
+    record_results=False; the coordinator stores the results. A heartbeat
+    thread keeps the worker's leases alive while it checks; on shutdown the
+    leases are released, and if the worker dies they run out.
+    """
+
+    stop_message = "stopping after current shard batch"
+
+    def __init__(self, queue, checker_factory, worker_id=None, batch_size=CLUSTER_BATCH_SIZE,
+                 heartbeat_interval=CLUSTER_HEARTBEAT_SECONDS):
+        super().__init__(checker_factory)
+        self.queue = queue
+        self.worker_id = worker_id or default_worker_id()
+        self.batch_size = batch_size
+        self.heartbeat_interval = heartbeat_interval
+
+    def heartbeat_loop(self):
+        while not self.stop_event.wait(self.heartbeat_interval):
+            try:
+                self.queue.heartbeat(self.worker_id)
+            except sqlite3.Error as e:
+                self.logger.warning(f"⚠️ Heartbeat failed: {e}")
+
+    def check_shards(self, shards):
+        """Check one claimed batch and report each result"""
+        checker = self.ensure_checker()
+        shard_ids = {(product_url, pincode): shard_id for shard_id, product_url, pincode in shards}
+        self.logger.info(f"📥 Claimed {len(shards)} shard(s) for pincode {shards[0][2]}")
+
+        if checker is None:
+            # Reported as ERROR so the coordinator reschedules them instead of this worker reclaiming them at once
+            records = self.unchecked_records(shard_ids)
+        else:
+            try:
+                records = checker.check_batch(list(shard_ids))
+            except Exception as e:
+                self.logger.error(f"✗ Unexpected error checking shards: {e}")
+                records = []
+
+        for record in records:
+            shard_id = shard_ids[(record["product_url"], record["pincode"])]
+            if not self.queue.complete(self.worker_id, shard_id, record):
+                self.logger.warning(f"⚠️ Lease on {record['product_url']} @ {record['pincode']} was lost - "
+                                    f"result dropped")
+
+        if not records:
+            # Let other workers retry the shards right away
+            self.queue.release(self.worker_id)
+        if checker is not None:
+            self.restart_if_failed(records, "batch")
+
+    def run(self):
+        """Claim and check shards until SIGTERM/SIGINT"""
+        self.handle_signals()
+        self.ensure_checker()
+        self.queue.heartbeat(self.worker_id)
+        heartbeat = threading.Thread(target=self.heartbeat_loop, name="heartbeat", daemon=True)
+        heartbeat.start()
+        self.logger.info(f"👷 Worker {self.worker_id} started, queue {self.queue.path}")
+
+        try:
+            while not self.stop_event.is_set():
+                shards = self.queue.claim(self.worker_id, self.batch_size)
+                if shards:
+                    self.check_shards(shards)
+                else:
+                    self.stop_event.wait(CLUSTER_POLL_INTERVAL)
+        finally:
+            self.stop_event.set()
+            heartbeat.join()
+            self.queue.release(self.worker_id)
+            self.discard_checker()
+            self.queue.close()
+            self.logger.info(f"👋 Worker {self.worker_id} stopped")
@@ -1,5 +1,127 @@
 # config.py
+import os
+
 PRODUCT_URL = "https://shop.amul.com/en/product/amul-chocolate-whey-protein-34-g-or-pack-of-60-sachets"
 PINCODE = "641014"
-STATUS_FILE = "amul_stock_status.json"
+HISTORY_DB = "amul_stock_history.db"
+STATUS_HISTORY_DAYS = 30  # restock history window shown by --status
 NTFY_TOPIC = "amul-stock-alert"
+
+# HTTP engine (browserless) settings
+SHOP_BASE_URL = "https://shop.amul.com"
+PINCODE_ENDPOINT = "/entity/pincode"
+PREFERENCES_ENDPOINT = "/entity/ms.settings/_/setPreferences"
+PRODUCTS_ENDPOINT = "/api/1/entity/ms.products"
+HTTP_TIMEOUT = 15
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+
+# Batch checking
+WATCHLIST_FILE = "watchlist.json"
+
+# Daemon mode
+DAEMON_INTERVAL = 60  # seconds between checks of a product, unless the watchlist sets "interval"
+DAEMON_JITTER = 0.1  # +/- fraction of the interval added at random to each schedule
+
+# WebDriver pool
+DRIVER_POOL_SIZE = 2
+DRIVER_MAX_PAGES = 200  # recycle a pooled browser after this many page loads
+DRIVER_MAX_RSS_MB = 1024  # recycle a pooled browser once its process tree grows past this
+# Cookies / localStorage keys holding the delivery location; kept when a pooled browser is reset
+PINCODE_STATE_COOKIES = ("jsessionid", "substore")
+PINCODE_STATE_STORAGE_KEYS = ("substore", "pincode")
+
+# Chrome profile: "standard" loads the full page, "lean" skips images, media,
+# fonts and trackers and stops waiting once the DOM is ready
+DRIVER_PROFILES = ("standard", "lean")
+DRIVER_PROFILE = "standard"
+LEAN_BLOCKED_URLS = [
+    "*.jpg", "*.jpeg", "*.png", "*.gif", "*.webp", "*.svg", "*.ico",
+    "*.mp4", "*.webm", "*.mp3",
+    "*.woff", "*.woff2", "*.ttf", "*.otf",
+    "*googletagmanager.com*", "*google-analytics.com*", "*doubleclick.net*",
+    "*facebook.net*", "*clarity.ms*", "*hotjar.com*",
+]
+
+# Delivery-location session state saved per pincode so repeat checks skip the pincode flow
+SESSION_CACHE_FILE = "session_cache.json"
+SESSION_CACHE_TTL = 6 * 3600  # seconds; 0 disables the cache
+
+# Per-step wait timeouts (seconds) for the Selenium pipeline
+STEP_TIMEOUTS = {
+    "navigate": 15,
+    "pincode_entry": 10,
+    "dropdown_select": 15,
+    "stock_read": 15,
+}
+
+# Selenium stock extraction: selector set of extraction.SELECTOR_REGISTRY to use, and the
+# confidence below which an IN_STOCK / SOLD_OUT reading is reported as UNKNOWN
+STOCK_SELECTOR_VERSION = 1
+STOCK_MIN_CONFIDENCE = 0.6
+
+# Notify when a product's price falls by at least this many percent since the last check
+# that read it (None: restock alerts only; --price-drop-alert sets it per run)
+PRICE_DROP_ALERT_PERCENT = None
+
+# Fast path: reuse the last full-check result while the product's stock data is unchanged
+FAST_PATH_CACHE_FILE = "fast_path_cache.json"
+FAST_PATH_MAX_AGE = 30 * 60  # seconds; older results are always re-checked
+
+# Metrics: served on /metrics in daemon mode, written to a textfile in cron mode
+METRICS_HOST = "127.0.0.1"
+METRICS_PORT = 9464  # 0 disables the endpoint
+METRICS_TEXTFILE = "amul_stock_checker.prom"
+
+# Log line format: "text" or "json" (one JSON object per line)
+LOG_FORMAT = "text"
+# The log is rotated daily and at LOG_MAX_BYTES; gzipped segments are pruned
+# (oldest first) to keep the log and its segments under LOG_MAX_TOTAL_MB
+LOG_FILE = "amul_stock_checker.log"
+LOG_MAX_BYTES = 5 * 1024 * 1024
+LOG_MAX_TOTAL_MB = 50
+
+# Notifications
+NOTIFY_CHANNELS = ["ntfy"]  # any of "ntfy", "telegram", "webhook"
+NTFY_SERVER = "https://ntfy.sh"
+TELEGRAM_API_URL = "https://api.telegram.org"
+TELEGRAM_BOT_TOKEN = os.environ.get("AMUL_TELEGRAM_BOT_TOKEN", "")
+TELEGRAM_CHAT_ID = os.environ.get("AMUL_TELEGRAM_CHAT_ID", "")
+WEBHOOK_URL = os.environ.get("AMUL_WEBHOOK_URL", "")
+NOTIFY_TIMEOUT = 10
+NOTIFY_RETRIES = 3  # extra attempts per message after the first one fails
+NOTIFY_BACKOFF = 1.0  # seconds before the first retry, doubled on each further retry
+
+# Adaptive polling (daemon --adaptive)
+ADAPTIVE_MIN_INTERVAL = 30  # seconds between checks around a SKU's usual restock times
+ADAPTIVE_MAX_INTERVAL = 600  # seconds between checks in a SKU's quiet periods
+ADAPTIVE_BUDGET_PER_MINUTE = 20  # page loads per minute across all SKUs
+ADAPTIVE_LEARN_DAYS = 28  # restock history used to learn the patterns
+ADAPTIVE_WINDOW_MINUTES = 90  # how far around a past restock time polling is stepped up
+ADAPTIVE_MIN_RESTOCKS = 2  # SKUs with fewer observed restocks keep the fixed interval
+
+# Parallel checks (--workers)
+SHOP_RATE_LIMIT_PER_MINUTE = 30  # requests/page loads per minute to the shop, shared by all workers
+SHOP_RATE_BURST = 5  # requests allowed back to back before the rate limit applies
+
+# Coordinator/worker mode (--coordinator / --worker); put the queue on a disk every node can reach
+CLUSTER_QUEUE_DB = "cluster_queue.db"
+CLUSTER_LEASE_SECONDS = 120  # a shard whose worker stops heartbeating is handed out again after this
+CLUSTER_HEARTBEAT_SECONDS = 20
+CLUSTER_BATCH_SIZE = 5  # shards (all of one pincode) a worker claims at a time
+CLUSTER_MAX_ATTEMPTS = 3  # leases of a shard before it is given up and recorded as ERROR
+CLUSTER_POLL_INTERVAL = 2  # seconds between queue polls of the coordinator and idle workers
+
+# Resilience: retries of transient step failures and the shop host's circuit breaker
+RETRY_ATTEMPTS = 3  # attempts per pipeline step when the site is down or rate limiting
+RETRY_BACKOFF = 1.0  # seconds before the first retry, doubled on each further retry (jittered)
+RETRY_MAX_DELAY = 30
+CIRCUIT_BREAKER_FILE = "circuit_breaker.json"
+CIRCUIT_FAILURE_THRESHOLD = 5  # failed checks of a host in a row before its checks are paused
+CIRCUIT_RESET_SECONDS = 10 * 60  # how long checks stay paused before a probe check is let through
+
+# Scheduled runs (--setup-cron): the tag marking our crontab line / systemd units, and the
+# single-instance lock that keeps a slow run from overlapping the next one
+SCHEDULE_TAG = "amul-stock-checker"
+SCHEDULE_INTERVAL_MINUTES = 1
+RUN_LOCK_FILE = "amul_stock_checker.lock"
+RUN_LOCK_STALE_SECONDS = 15 * 60  # a run holding the lock longer than this is considered hung and stopped
@@ -0,0 +1,215 @@
+# daemon.py
+import heapq
+import logging
+import random
+import signal
+import threading
+import time
+from checker_base import error_record
+from config import DAEMON_INTERVAL, DAEMON_JITTER
+from history import StockHistory
+from metrics import observe_record
+from resilience import CircuitBreaker
+
+
+class EntrySchedule:
+    """Due times of the watchlist entries, shared by the daemon and the cluster coordinator
+
+    Every entry has its own jittered interval: the entry's "interval", the
+    default interval, or whatever the optional policy (e.g.
+    AdaptiveScheduler) decides. Entries due within their jitter span of a
+    due entry are taken along with it, so the watchlist keeps running in
+    batches instead of drifting apart into one-entry cycles.
+    """
+
+    def __init__(self, entries, interval=DAEMON_INTERVAL, jitter=DAEMON_JITTER, policy=None):
+        self.interval = interval
+        self.jitter = jitter
+        self.policy = policy
+
+        # Heap of (due monotonic time, sequence, entry); the sequence breaks ties
+        now = time.monotonic()
+        self.heap = [(now, index, entry) for index, entry in enumerate(entries)]
+        heapq.heapify(self.heap)
+        # How early each entry may be taken along: its whole jitter span
+        self.spans = {index: self.span(entry.get("interval") or interval) for index, entry in enumerate(entries)}
+
+    def span(self, interval):
+        return 2 * self.jitter * interval
+
+    def entry_interval(self, index, entry):
+        """Return the jittered interval until the entry's next check"""
+        if self.policy is not None:
+            interval = self.policy.interval(entry)
+        else:
+            interval = entry.get("interval") or self.interval
+        self.spans[index] = self.span(interval)
+        return interval * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    def pop_due(self):
+        """Pop every entry that is due now, plus the entries due within their jitter span"""
+        now = time.monotonic()
+        if not self.heap or self.heap[0][0] > now:
+            return []
+
+        due, later = [], []
+        horizon = now + max(self.spans.values())
+        while self.heap and self.heap[0][0] <= horizon:
+            item = heapq.heappop(self.heap)
+            (due if item[0] <= now + self.spans[item[1]] else later).append(item)
+        for item in later:
+            heapq.heappush(self.heap, item)
+        return due
+
+    def reschedule(self, due):
+        """Schedule the next check of entries popped by pop_due(), never earlier than now
+
+        The whole batch counts its intervals from the earliest due time, so
+        entries taken along early fall back in step with the rest instead of
+        wandering off by their accumulated jitter.
+        """
+        now = time.monotonic()
+        start = min(scheduled for scheduled, _, _ in due)
+        for _, index, entry in due:
+            heapq.heappush(self.heap, (max(start + self.entry_interval(index, entry), now), index, entry))
+
+    def seconds_until_due(self):
+        return self.heap[0][0] - time.monotonic()
+
+
+class StoppableLoop:
+    """Base of the long-running loops: SIGTERM/SIGINT set stop_event, and the loop stops at its next check"""
+
+    stop_message = "stopping after current cycle"
+
+    def __init__(self):
+        self.stop_event = threading.Event()
+
+    def handle_signal(self, signum, frame):
+        self.logger.info(f"🛑 Received {signal.Signals(signum).name}, {self.stop_message}")
+        self.stop_event.set()
+
+    def handle_signals(self):
+        signal.signal(signal.SIGTERM, self.handle_signal)
+        signal.signal(signal.SIGINT, self.handle_signal)
+
+
+class WarmCheckerLoop(StoppableLoop):
+    """Loop that keeps one checker (browser or HTTP session) warm across its batches"""
+
+    def __init__(self, checker_factory):
+        super().__init__()
+        self.checker_factory = checker_factory
+        self.checker = None
+        self.logger = logging.getLogger(type(self).__module__)
+
+    def ensure_checker(self):
+        """Create the checker if there is none (first batch or after a failed batch)
+
+        Returns None if it could not be created (e.g. Chrome failed to
+        launch); the loop keeps running and tries again with the next batch.
+        """
+        if self.checker is None:
+            try:
+                self.checker = self.checker_factory()
+            except Exception as e:
+                self.logger.error(f"✗ Could not start the checker, retrying with the next batch: {e}")
+                return None
+            self.logger = self.checker.logger
+        return self.checker
+
+    def unchecked_records(self, pairs):
+        """ERROR records of pairs that could not be checked because there is no checker"""
+        return [error_record(product_url, pincode, "browser_crashed") for product_url, pincode in pairs]
+
+    def discard_checker(self):
+        """Close the current checker so the next batch starts a fresh one"""
+        if self.checker is not None:
+            self.checker.cleanup()
+            self.checker = None
+
+    def restart_if_failed(self, records, batch):
+        """Discard the checker after a batch where nothing could be checked
+
+        That usually means the browser or session is broken; the next batch
+        starts over with a fresh checker.
+        """
+        if not records or all(record["status"] == "ERROR" for record in records):
+            self.logger.warning(f"⚠️ Every check in the {batch} failed, restarting the checker")
+            self.discard_checker()
+
+
+class StockDaemon(WarmCheckerLoop):
+    """Long-running scheduler that keeps one warm checker across check cycles
+
+    Every watchlist entry has its own interval; on each wake-up all entries
+    that are due run together as one batch on the same checker, so the
+    browser (or HTTP session) and the selected pincode are reused. Cycles
+    run one after another on a single thread and can therefore never overlap.
+    An optional policy (e.g. AdaptiveScheduler) decides each entry's interval.
+    Entries of a shop host whose circuit breaker is open are skipped until
+    it lets a probe through.
+    """
+
+    def __init__(self, checker_factory, entries, interval=DAEMON_INTERVAL, jitter=DAEMON_JITTER, policy=None):
+        super().__init__(checker_factory)
+        self.entries = entries
+        self.interval = interval
+        self.schedule = EntrySchedule(entries, interval, jitter, policy)
+        self.circuit = CircuitBreaker()
+
+    def check_pairs(self, pairs):
+        """Check the pairs as one batch on the warm checker"""
+        checker = self.ensure_checker()
+        self.logger.info(f"🔁 Daemon cycle: {len(pairs)} check(s) due")
+        if checker is None:
+            self.record_unchecked(pairs)
+            return
+
+        try:
+            results = checker.check_batch(pairs)
+        except Exception as e:
+            self.logger.error(f"✗ Unexpected error during daemon cycle: {e}")
+            results = []
+
+        # One coalesced notification per channel for the whole cycle
+        checker.notifier.flush()
+        self.restart_if_failed(results, "cycle")
+
+    def record_unchecked(self, pairs):
+        """Store ERROR results for a cycle that ran without a checker"""
+        history = StockHistory()
+        try:
+            for record in self.unchecked_records(pairs):
+                observe_record(record)
+                history.record(record["product_url"], record["pincode"], "ERROR")
+        except Exception as e:
+            self.logger.error(f"✗ Error saving status: {e}")
+        finally:
+            history.close()
+
+    def run_cycle(self, due):
+        """Check the due entries (of hosts whose circuit is not open) as one batch and reschedule them"""
+        pairs = self.circuit.allowed_pairs([(entry["product_url"], entry["pincode"]) for _, _, entry in due])
+        if pairs:
+            self.check_pairs(pairs)
+        self.schedule.reschedule(due)
+
+    def run(self):
+        """Run check cycles until SIGTERM/SIGINT"""
+        self.handle_signals()
+
+        self.ensure_checker()
+        self.logger.info(f"👹 Daemon started: {len(self.entries)} check(s), default interval {self.interval}s")
+
+        try:
+            while not self.stop_event.is_set():
+                due = self.schedule.pop_due()
+                if due:
+                    self.run_cycle(due)
+                    continue
+
+                self.stop_event.wait(self.schedule.seconds_until_due())
+        finally:
+            self.discard_checker()
+            self.logger.info("👋 Daemon stopped")
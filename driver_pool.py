@@ -0,0 +1,249 @@
+# driver_pool.py
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from checker import AmulStockChecker, launch_chrome
+from checker_base import error_record
+from config import (
+    DRIVER_POOL_SIZE, DRIVER_MAX_PAGES, DRIVER_MAX_RSS_MB, DRIVER_PROFILE,
+    PINCODE_STATE_COOKIES, PINCODE_STATE_STORAGE_KEYS
+)
+from proctree import process_tree_rss_mb
+from watchlist import group_by_pincode
+
+# Clears localStorage (except the delivery-location keys) and sessionStorage
+RESET_STORAGE_SCRIPT = """
+const keep = arguments[0];
+for (const key of Object.keys(window.localStorage)) {
+    if (!keep.includes(key)) window.localStorage.removeItem(key);
+}
+window.sessionStorage.clear();
+"""
+
+
+class PooledDriver:
+    """A pooled Chrome instance and its usage bookkeeping"""
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.pages = 0
+        self.selected_pincode = None
+        self.launched_at = time.monotonic()
+
+    @property
+    def pid(self):
+        return self.driver.service.process.pid
+
+
+class DriverPool:
+    """Pool of warm headless Chrome instances shared by concurrent checks
+
+    Drivers are health-checked and reset (cookies and storage, except the
+    delivery-location state) when they come back, recycled after too many
+    page loads or too much memory, and replaced if they have crashed.
+    """
+
+    def __init__(self, size=DRIVER_POOL_SIZE, headless=True, max_pages=DRIVER_MAX_PAGES,
+                 max_rss_mb=DRIVER_MAX_RSS_MB, profile=DRIVER_PROFILE):
+        self.size = size
+        self.headless = headless
+        self.profile = profile
+        self.max_pages = max_pages
+        self.max_rss_mb = max_rss_mb
+        self.idle = []
+        self.total = 0
+        self.closed = False
+        self.condition = threading.Condition()
+        self.logger = logging.getLogger(__name__)
+
+    def launch(self):
+        """Launch a new pooled Chrome instance"""
+        started = time.monotonic()
+        pooled = PooledDriver(launch_chrome(self.headless, self.profile))
+        self.logger.info(f"✓ Pooled Chrome driver launched in {time.monotonic() - started:.1f}s")
+        return pooled
+
+    def start(self):
+        """Pre-launch every driver of the pool"""
+        for _ in range(self.size):
+            try:
+                pooled = self.launch()
+            except Exception as e:
+                self.logger.error(f"✗ Failed to pre-launch pooled Chrome driver: {e}")
+                continue
+            with self.condition:
+                self.total += 1
+                self.idle.append(pooled)
+                self.condition.notify()
+        return self
+
+    def acquire(self, pincode=None, timeout=None):
+        """Lease a driver, preferring one that already has the pincode selected
+
+        Launches a new driver when the pool is below size; otherwise waits for
+        one to be released. Raises TimeoutError if none became free in time.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self.condition:
+            while True:
+                if self.closed:
+                    raise RuntimeError("Driver pool is closed")
+                if self.idle:
+                    for index, pooled in enumerate(self.idle):
+                        if pooled.selected_pincode == pincode:
+                            return self.idle.pop(index)
+                    return self.idle.pop(0)
+                if self.total < self.size:
+                    self.total += 1
+                    break
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    raise TimeoutError("No pooled driver became free in time")
+                self.condition.wait(remaining)
+
+        # Launch outside the lock so other leases are not blocked by Chrome startup
+        try:
+            return self.launch()
+        except Exception:
+            with self.condition:
+                self.total -= 1
+                self.condition.notify()
+            raise
+
+    def is_healthy(self, pooled):
+        """Check that the browser still answers"""
+        try:
+            return pooled.driver.execute_script("return 1") == 1
+        except Exception:
+            return False
+
+    def needs_recycling(self, pooled):
+        """Return the reason a driver should be replaced, or None"""
+        if not self.is_healthy(pooled):
+            return "crashed or unresponsive"
+        if pooled.pages >= self.max_pages:
+            return f"served {pooled.pages} pages"
+        rss_mb = process_tree_rss_mb(pooled.pid)
+        if rss_mb is not None and rss_mb > self.max_rss_mb:
+            return f"uses {rss_mb:.0f} MB"
+        return None
+
+    def reset(self, pooled):
+        """Clear cookies and storage, keeping the delivery-location state"""
+        driver = pooled.driver
+        kept = False
+        for cookie in driver.get_cookies():
+            if cookie["name"] in PINCODE_STATE_COOKIES:
+                kept = True
+            else:
+                driver.delete_cookie(cookie["name"])
+        try:
+            driver.execute_script(RESET_STORAGE_SCRIPT, list(PINCODE_STATE_STORAGE_KEYS))
+        except Exception:
+            # Pages without web storage (about:blank, error pages)
+            pass
+        if not kept:
+            pooled.selected_pincode = None
+
+    def quit(self, pooled):
+        try:
+            pooled.driver.quit()
+        except Exception as e:
+            self.logger.warning(f"⚠️ Error quitting pooled driver: {e}")
+
+    def release(self, pooled, pages=0):
+        """Return a leased driver, recycling it if it crashed or wore out"""
+        pooled.pages += pages
+        reason = self.needs_recycling(pooled)
+
+        if reason is None:
+            try:
+                self.reset(pooled)
+            except Exception as e:
+                reason = f"reset failed ({e})"
+
+        if reason is not None:
+            self.logger.info(f"♻️ Recycling pooled driver: {reason}")
+            self.quit(pooled)
+            with self.condition:
+                # The slot is refilled by the next acquire()
+                self.total -= 1
+                self.condition.notify()
+            return
+
+        with self.condition:
+            if self.closed:
+                self.quit(pooled)
+                self.total -= 1
+                return
+            self.idle.append(pooled)
+            self.condition.notify()
+
+    def close(self):
+        """Quit every idle driver; leased ones are quit when released"""
+        with self.condition:
+            self.closed = True
+            idle, self.idle = self.idle, []
+            self.total -= len(idle)
+            self.condition.notify_all()
+        for pooled in idle:
+            self.quit(pooled)
+
+
+class PooledStockChecker(AmulStockChecker):
+    """AmulStockChecker that runs batches on a DriverPool, one pincode group per browser
+
+    Pincode groups run concurrently, each on a leased driver; a driver that
+    already has a group's pincode selected is preferred so the pincode flow
+    is skipped.
+    """
+
+    def __init__(self, pool, log_file=None, notifier=None, history=None, circuit=None):
+        self.pool = pool
+        self.log_file = log_file
+        super().__init__(log_file=log_file, notifier=notifier, history=history, circuit=circuit)
+
+    def setup_driver(self, headless, profile=None):
+        """Drivers are leased from the pool per pincode group instead"""
+        self.driver = None
+        self.owns_driver = False
+
+    def check_group(self, pincode, product_urls):
+        """Check one pincode's products on a leased driver"""
+        pairs = [(product_url, pincode) for product_url in product_urls]
+        try:
+            pooled = self.pool.acquire(pincode)
+        except Exception as e:
+            self.logger.error(f"✗ Could not lease a driver for pincode {pincode}: {e}")
+            return [error_record(product_url, pincode) for product_url, pincode in pairs]
+
+        checker = AmulStockChecker(log_file=self.log_file, driver=pooled.driver,
+                                   notifier=self.notifier, history=self.history, circuit=self.circuit)
+        checker.selected_pincode = pooled.selected_pincode
+        checker.price_drop_percent = self.price_drop_percent
+        try:
+            return checker.check_batch(pairs)
+        finally:
+            # Unregisters the session restore script (if no page load consumed it) so the next
+            # lease, maybe for another pincode, does not get this pincode's localStorage
+            checker.cleanup()
+            pooled.selected_pincode = checker.selected_pincode
+            self.pool.release(pooled, pages=checker.pages_loaded)
+
+    def check_batch(self, pairs):
+        """Check every (product_url, pincode) pair across the pool's drivers"""
+        groups = group_by_pincode(pairs)
+        with ThreadPoolExecutor(max_workers=self.pool.size) as executor:
+            futures = [executor.submit(self.check_group, pincode, urls) for pincode, urls in groups.items()]
+            return [record for future in futures for record in future.result()]
+
+    def run_stock_check(self):
+        """Run the single configured product/pincode check on a pooled driver"""
+        return self.run_batch_check([(self.product_url, self.pincode)])
+
+    def cleanup(self):
+        """Shut the pool down"""
+        self.close_shared()
+        self.pool.close()
+        self.logger.info("🧹 Driver pool closed \n\n")
@@ -0,0 +1,222 @@
+# extraction.py
+import re
+from dataclasses import dataclass, asdict
+from config import STOCK_SELECTOR_VERSION, STOCK_MIN_CONFIDENCE
+
+# Versioned CSS selectors of the product page. When the shop changes its
+# markup, add a new version instead of editing one in place, and switch
+# STOCK_SELECTOR_VERSION, so results can be traced to the selectors used.
+SELECTOR_REGISTRY = {
+    1: {
+        "sold_out_alert": "div.alert.alert-danger.mt-3",
+        "add_to_cart": "a.add-to-cart, button.add-to-cart",
+        "product_name": ".product-name",
+        "price": ".product-price, [itemprop=price]",
+        "mrp": ".product-mrp",
+        "quantity_input": "input.quantity, input[name=quantity]",
+        "product_json": "script#product-data, script[type='application/ld+json']",
+    },
+}
+
+# Weight of each signal's vote; see classify_signals()
+SIGNAL_WEIGHTS = {
+    "sold_out_alert": 0.4,
+    "add_to_cart": 0.3,
+    "product_json": 0.3,
+}
+# A missing sold-out alert or add-to-cart button is weaker evidence than a present one
+ABSENT_ALERT_WEIGHT = 0.2
+ABSENT_BUTTON_WEIGHT = 0.1
+# Signals whose IN_STOCK vote is positive evidence (an enabled button, product data saying
+# available); without one of them a page never reads as IN_STOCK, however the weights add up
+IN_STOCK_EVIDENCE = ("add_to_cart", "product_json")
+# Confidence is scaled by this when no price is rendered (the page may be incomplete)
+MISSING_PRICE_FACTOR = 0.8
+
+# Reads every signal in one round trip; arguments[0] is a selector set from SELECTOR_REGISTRY
+EXTRACT_SCRIPT = """
+const selectors = arguments[0];
+const visible = el => !!(el && (el.offsetWidth || el.offsetHeight || el.getClientRects().length));
+const text = el => el ? el.textContent.trim() : null;
+
+const alert = document.querySelector(selectors.sold_out_alert);
+const button = document.querySelector(selectors.add_to_cart);
+
+// Embedded product data: the shop's own JSON or schema.org Product markup
+let product = null;
+for (const script of document.querySelectorAll(selectors.product_json)) {
+    let data;
+    try { data = JSON.parse(script.textContent); } catch (e) { continue; }
+    for (const item of [].concat(data['@graph'] || data)) {
+        if (item && item.offers && item.offers.availability) {
+            product = {available: /InStock|LimitedAvailability/.test(item.offers.availability), quantity: null,
+                       price: item.offers.price ?? null, mrp: null, max_quantity: null};
+        } else if (item && 'available' in item) {
+            product = {available: !!item.available, quantity: item.inventory_quantity ?? null,
+                       price: item.price ?? null, mrp: item.compare_price ?? null,
+                       max_quantity: item.max_order_qty ?? null};
+        }
+        if (product) break;
+    }
+    if (product) break;
+}
+
+return {
+    ready_state: document.readyState,
+    alert: alert ? {visible: visible(alert), text: text(alert)} : null,
+    button: button ? {
+        visible: visible(button),
+        disabled: !!(button.disabled || button.classList.contains('disabled') || button.getAttribute('aria-disabled') === 'true'),
+    } : null,
+    product: product,
+    price: text(document.querySelector(selectors.price)),
+    mrp: text(document.querySelector(selectors.mrp)),
+    max_quantity: (document.querySelector(selectors.quantity_input) || {max: null}).max || null,
+    name: text(document.querySelector(selectors.product_name)),
+};
+"""
+
+
+@dataclass
+class StockResult:
+    """What a stock check read about a product; prices are whole paise"""
+
+    status: str
+    confidence: float = None
+    product_name: str = None
+    variant: str = None
+    price: int = None
+    mrp: int = None
+    max_quantity: int = None
+
+    @property
+    def discount_percent(self):
+        """Percent off the MRP, or None without both prices"""
+        if self.price is None or not self.mrp:
+            return None
+        return round(max(0, self.mrp - self.price) / self.mrp * 100, 1)
+
+    def as_record(self):
+        """The fields saved with a status record"""
+        return {**asdict(self), "discount_percent": self.discount_percent}
+
+
+def parse_price(value):
+    """Convert a price in rupees ("₹1,299.50", 1299.5, "1299") to paise, or None"""
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return round(value * 100)
+    match = re.search(r"\d[\d,]*(?:\.\d+)?", value)
+    return round(float(match.group().replace(",", "")) * 100) if match else None
+
+
+def parse_quantity(value):
+    try:
+        return int(value) if value not in (None, "") else None
+    except (TypeError, ValueError):
+        return None
+
+
+def format_price(paise):
+    """Format paise as rupees, e.g. "₹1,299.50" """
+    return f"₹{paise / 100:,.2f}"
+
+
+def split_product_name(name):
+    """Split "Amul Whey Protein, 34 g | Pack of 60" into the name and the pack variant"""
+    if not name:
+        return name, None
+    short_name, _, variant = name.partition(",")
+    return short_name.strip(), variant.strip() or None
+
+
+def selectors(version=STOCK_SELECTOR_VERSION):
+    return SELECTOR_REGISTRY[version]
+
+
+def read_signals(driver, version=STOCK_SELECTOR_VERSION):
+    """Read the stock signals of the loaded product page with a single script call"""
+    return driver.execute_script(EXTRACT_SCRIPT, selectors(version))
+
+
+def signal_votes(signals):
+    """Turn the page signals into (signal, status, weight) votes"""
+    votes = []
+    alert = signals.get("alert")
+    if alert and alert["visible"]:
+        status = "SOLD_OUT" if "sold out" in (alert["text"] or "").lower() else "UNKNOWN"
+        votes.append(("sold_out_alert", status, SIGNAL_WEIGHTS["sold_out_alert"]))
+    else:
+        votes.append(("sold_out_alert", "IN_STOCK", ABSENT_ALERT_WEIGHT))
+
+    button = signals.get("button")
+    if button and button["visible"] and not button["disabled"]:
+        votes.append(("add_to_cart", "IN_STOCK", SIGNAL_WEIGHTS["add_to_cart"]))
+    elif button:
+        votes.append(("add_to_cart", "SOLD_OUT", SIGNAL_WEIGHTS["add_to_cart"]))
+    else:
+        votes.append(("add_to_cart", "SOLD_OUT", ABSENT_BUTTON_WEIGHT))
+
+    product = signals.get("product")
+    if product is not None:
+        in_stock = product["available"] and (product["quantity"] is None or product["quantity"] > 0)
+        votes.append(("product_json", "IN_STOCK" if in_stock else "SOLD_OUT", SIGNAL_WEIGHTS["product_json"]))
+    return votes
+
+
+def classify_signals(signals, min_confidence=STOCK_MIN_CONFIDENCE):
+    """Decide the stock status from the page signals
+
+    Every signal votes for a status with its weight; the status with the
+    most weight wins, and the confidence is its share of all the weight
+    (scaled down when no price is rendered). A page with none of the
+    product's elements is UNKNOWN with confidence 0, and so is a stock
+    status below min_confidence. IN_STOCK also needs a positive vote from
+    one of IN_STOCK_EVIDENCE: a page where only absent elements point to it
+    (half-rendered, or markup the selectors no longer match) is UNKNOWN.
+    Returns (status, confidence, votes).
+    """
+    rendered = any(signals.get(key) for key in ("alert", "button", "product", "price", "name"))
+    if not rendered:
+        return "UNKNOWN", 0.0, []
+
+    votes = signal_votes(signals)
+    totals = {}
+    for _, status, weight in votes:
+        totals[status] = totals.get(status, 0) + weight
+    status = max(totals, key=totals.get)
+    confidence = totals[status] / sum(totals.values())
+    if not signals.get("price"):
+        confidence *= MISSING_PRICE_FACTOR
+    confidence = round(confidence, 2)
+
+    if status != "UNKNOWN" and confidence < min_confidence:
+        return "UNKNOWN", confidence, votes
+    if status == "IN_STOCK" and not any(
+            name in IN_STOCK_EVIDENCE and vote == "IN_STOCK" for name, vote, _ in votes):
+        return "UNKNOWN", confidence, votes
+    return status, confidence, votes
+
+
+def extract_stock(signals):
+    """Build the StockResult of a product page from its signals"""
+    status, confidence, votes = classify_signals(signals)
+    product = signals.get("product") or {}
+    product_name, variant = split_product_name(signals.get("name"))
+    result = StockResult(
+        status=status,
+        confidence=confidence,
+        product_name=product_name,
+        variant=variant,
+        # Rendered prices first; the embedded data fills the gaps
+        price=parse_price(signals.get("price")) or parse_price(product.get("price")),
+        mrp=parse_price(signals.get("mrp")) or parse_price(product.get("mrp")),
+        max_quantity=parse_quantity(signals.get("max_quantity")) or parse_quantity(product.get("max_quantity")),
+    )
+    return result, votes
+
+
+def format_votes(votes):
+    """Format votes for a log line, e.g. "sold_out_alert=SOLD_OUT(0.4) add_to_cart=SOLD_OUT(0.1)" """
+    return " ".join(f"{name}={status}({weight})" for name, status, weight in votes)
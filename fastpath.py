@@ -0,0 +1,210 @@
+# fastpath.py
+import hashlib
+import json
+import time
+import requests
+from checker_base import StockCheckerBase
+from extraction import StockResult
+from config import FAST_PATH_CACHE_FILE, FAST_PATH_MAX_AGE
+from history import STOCK_STATUSES
+from json_store import load_json, update_json
+from http_checker import AmulHttpChecker
+from metrics import REGISTRY
+from timing import format_timings
+
+FAST_PATH_CHECKS = REGISTRY.counter(
+    "amul_fast_path_checks_total", "Fast path pre-checks by result (hit, miss, error)", ["result"])
+
+# StockResult fields reused from the last full check on a cache hit
+CACHED_DETAILS = ("confidence", "variant", "price", "mrp", "max_quantity")
+
+
+def stock_fingerprint(product):
+    """Hash the parts of a product record that decide its stock status and tracked details"""
+    if product is None:
+        fragment = {"listed": False}
+    else:
+        quantity = product.get("inventory_quantity")
+        fragment = {
+            "listed": True,
+            "available": product.get("available"),
+            "in_stock": None if quantity is None else quantity > 0,
+            "price": product.get("price"),
+            "compare_price": product.get("compare_price"),
+            "max_order_qty": product.get("max_order_qty"),
+        }
+    return hashlib.sha256(json.dumps(fragment, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+class FastPathCache:
+    """Last full-check result per product and pincode, with the product data's validators
+
+    Saved as JSON together with the running hit/miss totals, so the hit
+    rate covers every run (cron runs are one check each).
+    """
+
+    def __init__(self, path=FAST_PATH_CACHE_FILE):
+        self.path = path
+        self.data = self.load()
+
+    def load(self):
+        return self.with_defaults(load_json(self.path))
+
+    def with_defaults(self, data):
+        data.setdefault("entries", {})
+        data.setdefault("stats", {"hits": 0, "misses": 0})
+        return data
+
+    def key(self, product_url, pincode):
+        return f"{pincode}|{product_url}"
+
+    def get(self, product_url, pincode):
+        return self.data["entries"].get(self.key(product_url, pincode))
+
+    def save(self, updates, hits, misses):
+        """Merge this cycle's entries and counts into the file (other processes may have written it)"""
+        def merge(data):
+            self.with_defaults(data)
+            data["entries"].update(updates)
+            data["stats"]["hits"] += hits
+            data["stats"]["misses"] += misses
+            return data
+
+        self.data = update_json(self.path, merge)
+
+
+class FastPathChecker(StockCheckerBase):
+    """Skips the full check when the product's stock data has not changed
+
+    Before each check the product data is fetched from the shop's JSON
+    endpoint, conditionally (If-None-Match / If-Modified-Since). If it is
+    unchanged (304) or its stock fingerprint matches the one stored with the
+    last full-check result, that result is reused; otherwise the pair is
+    escalated to the full checker, created on first use by
+    checker_factory(notifier, history). Cached results older than max_age
+    seconds are always re-checked.
+    """
+
+    def __init__(self, checker_factory, log_file=None, base_url=None, max_age=FAST_PATH_MAX_AGE,
+                 notifier=None, history=None):
+        self.setup_logging(log_file)
+        self.setup_state(notifier, history)
+        self.checker_factory = checker_factory
+        self.full_checker = None
+        self.max_age = max_age
+        self.cache = FastPathCache()
+        self.http = AmulHttpChecker(log_file=log_file, base_url=base_url, record_results=False)
+        # A failed pre-check falls back to the full check, which does the retrying
+        self.http.retry_attempts = 1
+
+    def pre_check(self, product_url, pincode):
+        """Return (cached status or None, cache entry to store after a full check)"""
+        entry = self.cache.get(product_url, pincode)
+        http = self.http
+        http.pincode = pincode
+        http.product_url = product_url
+
+        if http.selected_pincode != pincode:
+            http.selected_pincode = None
+            if not (http.lookup_substore() and http.set_preferences()):
+                return None, None
+            http.selected_pincode = pincode
+
+        headers = {}
+        if entry and entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry and entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+
+        try:
+            response = http.request_product(headers)
+            if response.status_code == 304 and entry:
+                fingerprint = entry["fingerprint"]
+            else:
+                response.raise_for_status()
+                records = response.json().get("data", [])
+                fingerprint = stock_fingerprint(records[0] if records else None)
+        except (requests.exceptions.RequestException, ValueError) as e:
+            self.logger.warning(f"⚠️ Fast path pre-check failed, running the full check: {e}")
+            return None, None
+
+        new_entry = {
+            "fingerprint": fingerprint,
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+        }
+        if entry and entry["fingerprint"] == fingerprint and time.time() - entry["checked_at"] < self.max_age:
+            return entry["status"], None
+        return None, new_entry
+
+    def check_batch(self, pairs):
+        """Answer unchanged pairs from the cache and run the full check for the rest"""
+        results = {}
+        escalate = []
+        pending = {}
+        errors = 0
+
+        for product_url, pincode in pairs:
+            started = time.perf_counter()
+            status, new_entry = self.pre_check(product_url, pincode)
+            if status is None:
+                escalate.append((product_url, pincode))
+                if new_entry is None:
+                    errors += 1
+                else:
+                    pending[(product_url, pincode)] = new_entry
+                continue
+
+            entry = self.cache.get(product_url, pincode)
+            self.product_url, self.pincode = product_url, pincode
+            self.product_name = entry.get("product_name")
+            self.step_timings = {"fast_path": round(time.perf_counter() - started, 3)}
+            self.logger.info(f"⚡ {product_url} @ {pincode}: {status} unchanged ({format_timings(self.step_timings)})")
+            result = StockResult(status, product_name=self.product_name, **entry.get("details", {}))
+            results[(product_url, pincode)] = self.record_result(result)
+
+        updates = {}
+        if escalate:
+            self.logger.info(f"🔎 {len(escalate)} check(s) changed or not cached - running the full check")
+            if self.full_checker is None:
+                self.full_checker = self.checker_factory(self.notifier, self.history)
+            for record in self.full_checker.check_batch(escalate):
+                key = (record["product_url"], record["pincode"])
+                results[key] = record
+                if key in pending and record["status"] in STOCK_STATUSES:
+                    updates[self.cache.key(*key)] = {
+                        **pending[key],
+                        "status": record["status"],
+                        "product_name": record.get("product_name"),
+                        "details": {field: record.get(field) for field in CACHED_DETAILS},
+                        "checked_at": time.time(),
+                    }
+
+        hits = len(pairs) - len(escalate)
+        misses = len(escalate) - errors
+        FAST_PATH_CHECKS.inc(hits, result="hit")
+        FAST_PATH_CHECKS.inc(misses, result="miss")
+        FAST_PATH_CHECKS.inc(errors, result="error")
+        self.cache.save(updates, hits, misses)
+        self.log_hit_rate(hits, len(pairs))
+
+        return [results[pair] for pair in pairs if pair in results]
+
+    def log_hit_rate(self, hits, checks):
+        stats = self.cache.data["stats"]
+        total = stats["hits"] + stats["misses"]
+        overall = stats["hits"] / total * 100 if total else 0
+        self.logger.info(f"⚡ Fast path: {hits}/{checks} served from cache this run; "
+                         f"{overall:.0f}% overall ({stats['hits']} full check(s) saved)")
+
+    def run_stock_check(self):
+        """Run the single configured product/pincode check through the fast path"""
+        return self.run_batch_check([(self.product_url, self.pincode)])
+
+    def cleanup(self):
+        """Close the full checker (if one was needed), the HTTP session and shared resources"""
+        if self.full_checker is not None:
+            self.full_checker.cleanup()
+            self.full_checker = None
+        self.http.cleanup()
+        self.close_shared()
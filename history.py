@@ -0,0 +1,263 @@
+# history.py
+import sqlite3
+import threading
+import time
+from config import HISTORY_DB
+
+STATUS_CODES = {"IN_STOCK": 1, "SOLD_OUT": 2, "UNKNOWN": 3, "ERROR": 4}
+STATUS_NAMES = {code: name for name, code in STATUS_CODES.items()}
+# Only these statuses describe the stock; UNKNOWN/ERROR samples never start a transition
+STOCK_STATUSES = ("IN_STOCK", "SOLD_OUT")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS skus (
+    id INTEGER PRIMARY KEY,
+    product_url TEXT NOT NULL,
+    pincode TEXT NOT NULL,
+    UNIQUE (product_url, pincode)
+);
+CREATE TABLE IF NOT EXISTS samples (
+    sku_id INTEGER NOT NULL,
+    ts REAL NOT NULL,
+    status INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS samples_sku_ts ON samples (sku_id, ts);
+CREATE TABLE IF NOT EXISTS transitions (
+    sku_id INTEGER NOT NULL,
+    ts REAL NOT NULL,
+    from_status INTEGER,
+    to_status INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS transitions_sku_ts ON transitions (sku_id, ts);
+CREATE TABLE IF NOT EXISTS latest (
+    sku_id INTEGER PRIMARY KEY,
+    ts REAL NOT NULL,
+    status INTEGER NOT NULL,
+    stock_status INTEGER,
+    stock_since REAL,
+    samples INTEGER NOT NULL DEFAULT 0
+);
+"""
+
+# Columns added after the first schema version: (table, column, type).
+# Prices are whole paise and quantities plain integers, so SQLite stores each
+# in a few bytes, and NULL (not read) costs almost nothing.
+ADDED_COLUMNS = [
+    ("skus", "variant", "TEXT"),
+    ("samples", "price", "INTEGER"),
+    ("samples", "mrp", "INTEGER"),
+    ("samples", "max_quantity", "INTEGER"),
+    ("latest", "price", "INTEGER"),
+    ("latest", "mrp", "INTEGER"),
+    ("latest", "max_quantity", "INTEGER"),
+    # Time of the SKU's last check that did not end in ERROR
+    ("latest", "last_success_ts", "REAL"),
+]
+
+
+# Columns read by latest_record()
+LATEST_COLUMNS = "l.ts, l.status, l.stock_status, l.stock_since, l.samples, l.price, l.mrp, l.max_quantity, s.variant"
+
+
+class StockHistory:
+    """Append-only stock history keyed by product and pincode, stored in SQLite
+
+    Every check is appended to `samples`. Changes of the stock status
+    (IN_STOCK <-> SOLD_OUT) are also appended to `transitions`, and the
+    `latest` table keeps one row per SKU, so "last status" lookups and
+    restock history stay cheap however many samples pile up. Samples also
+    carry the price, MRP and max orderable quantity when the check read
+    them; `latest` keeps the last known ones.
+    """
+
+    def __init__(self, path=HISTORY_DB):
+        self.path = path
+        self.lock = threading.Lock()
+        # Autocommit mode; write transactions are opened explicitly so several
+        # processes can share the file
+        self.conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+        self.add_columns()
+
+    def add_columns(self):
+        """Add the ADDED_COLUMNS to a history file created before they existed"""
+        for table, column, column_type in ADDED_COLUMNS:
+            columns = {row[1] for row in self.conn.execute(f"PRAGMA table_info({table})")}
+            if column not in columns:
+                try:
+                    self.conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {column_type}")
+                except sqlite3.OperationalError:
+                    # Another process added it first
+                    continue
+                if column == "last_success_ts":
+                    # One full scan of the samples, at upgrade time only
+                    self.conn.execute(
+                        """UPDATE latest SET last_success_ts = (
+                               SELECT MAX(ts) FROM samples WHERE sku_id = latest.sku_id AND status != ?)""",
+                        (STATUS_CODES["ERROR"],)
+                    )
+
+    def sku_id(self, product_url, pincode, create=True):
+        row = self.conn.execute(
+            "SELECT id FROM skus WHERE product_url = ? AND pincode = ?", (product_url, pincode)
+        ).fetchone()
+        if row or not create:
+            return row[0] if row else None
+        return self.conn.execute(
+            "INSERT INTO skus (product_url, pincode) VALUES (?, ?)", (product_url, pincode)
+        ).lastrowid
+
+    def record(self, product_url, pincode, status, ts=None, price=None, mrp=None, max_quantity=None,
+               variant=None):
+        """Append a check result and return the stock status and price it replaced
+
+        Returns (previous_stock_status, changed, previous_price): the last
+        IN_STOCK/SOLD_OUT status before this sample (None for a new SKU),
+        whether this sample changed it, and the last known price in paise.
+        """
+        ts = time.time() if ts is None else ts
+        code = STATUS_CODES[status]
+
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                sku_id = self.sku_id(product_url, pincode)
+                self.conn.execute(
+                    "INSERT INTO samples (sku_id, ts, status, price, mrp, max_quantity) VALUES (?, ?, ?, ?, ?, ?)",
+                    (sku_id, ts, code, price, mrp, max_quantity)
+                )
+                if variant is not None:
+                    self.conn.execute("UPDATE skus SET variant = ? WHERE id = ?", (variant, sku_id))
+
+                row = self.conn.execute(
+                    "SELECT stock_status, stock_since, price FROM latest WHERE sku_id = ?", (sku_id,)
+                ).fetchone()
+                previous_code, stock_since, previous_price = row if row else (None, None, None)
+
+                changed = status in STOCK_STATUSES and code != previous_code
+                if changed:
+                    self.conn.execute(
+                        "INSERT INTO transitions (sku_id, ts, from_status, to_status) VALUES (?, ?, ?, ?)",
+                        (sku_id, ts, previous_code, code)
+                    )
+                    stock_code, stock_since = code, ts
+                else:
+                    stock_code = previous_code
+
+                # Details not read by this check keep their last known value
+                # (and an ERROR keeps the last success time)
+                self.conn.execute(
+                    """INSERT INTO latest (sku_id, ts, status, stock_status, stock_since, samples,
+                                           price, mrp, max_quantity, last_success_ts)
+                       VALUES (?, ?, ?, ?, ?, 1, ?, ?, ?, ?)
+                       ON CONFLICT (sku_id) DO UPDATE SET
+                           ts = excluded.ts, status = excluded.status,
+                           stock_status = excluded.stock_status, stock_since = excluded.stock_since,
+                           samples = samples + 1,
+                           price = COALESCE(excluded.price, price), mrp = COALESCE(excluded.mrp, mrp),
+                           max_quantity = COALESCE(excluded.max_quantity, max_quantity),
+                           last_success_ts = COALESCE(excluded.last_success_ts, last_success_ts)""",
+                    (sku_id, ts, code, stock_code, stock_since, price, mrp, max_quantity,
+                     None if status == "ERROR" else ts)
+                )
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+
+        return STATUS_NAMES.get(previous_code), changed, previous_price
+
+    def last_status(self, product_url, pincode):
+        """Return the latest record for a SKU, or None if it was never checked"""
+        with self.lock:
+            row = self.conn.execute(
+                f"""SELECT {LATEST_COLUMNS}
+                   FROM latest l JOIN skus s ON s.id = l.sku_id
+                   WHERE s.product_url = ? AND s.pincode = ?""",
+                (product_url, pincode)
+            ).fetchone()
+        return self.latest_record(product_url, pincode, row) if row else None
+
+    def latest_record(self, product_url, pincode, row):
+        ts, status, stock_status, stock_since, samples, price, mrp, max_quantity, variant = row
+        return {
+            "product_url": product_url,
+            "pincode": pincode,
+            "timestamp": ts,
+            "status": STATUS_NAMES[status],
+            "stock_status": STATUS_NAMES.get(stock_status),
+            "stock_since": stock_since,
+            "samples": samples,
+            "price": price,
+            "mrp": mrp,
+            "max_quantity": max_quantity,
+            "variant": variant,
+        }
+
+    def all_latest(self):
+        """Return the latest record of every SKU"""
+        with self.lock:
+            rows = self.conn.execute(
+                f"""SELECT s.product_url, s.pincode, {LATEST_COLUMNS}
+                   FROM latest l JOIN skus s ON s.id = l.sku_id
+                   ORDER BY s.pincode, s.product_url"""
+            ).fetchall()
+        return [self.latest_record(row[0], row[1], row[2:]) for row in rows]
+
+    def last_success_times(self):
+        """Return {(product_url, pincode): ts} of every SKU's last check that did not end in ERROR"""
+        with self.lock:
+            rows = self.conn.execute(
+                """SELECT s.product_url, s.pincode, l.last_success_ts
+                   FROM latest l JOIN skus s ON s.id = l.sku_id
+                   WHERE l.last_success_ts IS NOT NULL"""
+            ).fetchall()
+        return {(product_url, pincode): ts for product_url, pincode, ts in rows}
+
+    def restock_times(self, product_url, pincode, since=None):
+        """Return the timestamps at which a SKU changed to IN_STOCK"""
+        with self.lock:
+            sku_id = self.sku_id(product_url, pincode, create=False)
+            if sku_id is None:
+                return []
+            rows = self.conn.execute(
+                "SELECT ts FROM transitions WHERE sku_id = ? AND ts >= ? AND to_status = ? ORDER BY ts",
+                (sku_id, since or 0, STATUS_CODES["IN_STOCK"])
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def in_stock_periods(self, product_url, pincode, since=None):
+        """Return [(start_ts, end_ts or None), ...] for every IN_STOCK period of a SKU
+
+        With since, only periods that overlap it are returned; a period that
+        was already running at since keeps its real start time.
+        """
+        with self.lock:
+            sku_id = self.sku_id(product_url, pincode, create=False)
+            if sku_id is None:
+                return []
+            rows = self.conn.execute(
+                "SELECT ts, to_status FROM transitions WHERE sku_id = ? AND ts >= ? ORDER BY ts",
+                (sku_id, since or 0)
+            ).fetchall()
+            # The last transition before the window tells whether it opened in stock
+            before = self.conn.execute(
+                "SELECT ts, to_status FROM transitions WHERE sku_id = ? AND ts < ? ORDER BY ts DESC LIMIT 1",
+                (sku_id, since or 0)
+            ).fetchone()
+
+        periods = []
+        start = before[0] if before and before[1] == STATUS_CODES["IN_STOCK"] else None
+        for ts, to_status in rows:
+            if to_status == STATUS_CODES["IN_STOCK"]:
+                start = ts
+            elif start is not None:
+                periods.append((start, ts))
+                start = None
+        if start is not None:
+            periods.append((start, None))
+        return periods
+
+    def close(self):
+        self.conn.close()
@@ -0,0 +1,230 @@
+import json
+import requests
+from config import (
+    SHOP_BASE_URL, PINCODE_ENDPOINT, PREFERENCES_ENDPOINT, PRODUCTS_ENDPOINT, HTTP_TIMEOUT, USER_AGENT
+)
+from checker_base import StockCheckerBase, product_alias
+from watchlist import group_by_pincode
+from timing import timed_step, format_timings
+from resilience import retry_step
+from extraction import StockResult, parse_price, split_product_name
+
+
+class AmulHttpChecker(StockCheckerBase):
+    """Browserless stock checker that talks to the shop's JSON endpoints directly.
+
+    Produces the same SOLD_OUT / IN_STOCK / UNKNOWN / ERROR results as
+    AmulStockChecker.check_stock_status without launching Chrome.
+    """
+
+    def __init__(self, log_file=None, base_url=None, notifier=None, history=None, record_results=True,
+                 circuit=None):
+        """Initialize the HTTP session"""
+        self.setup_logging(log_file)
+        self.setup_state(notifier, history, record_results, circuit)
+        self.base_url = (base_url or SHOP_BASE_URL).rstrip("/")
+        self.substore = None
+
+        self.session = requests.Session()
+        self.session.headers.update({
+            "User-Agent": USER_AGENT,
+            "Accept": "application/json, text/plain, */*",
+            "Referer": f"{self.base_url}/",
+        })
+
+    @timed_step("pincode_lookup")
+    @retry_step("pincode_lookup")
+    def lookup_substore(self):
+        """Resolve the delivery substore for the configured pincode"""
+        try:
+            self.logger.info(f"🔍 Looking up substore for pincode: {self.pincode}")
+            self.throttle()
+            response = self.session.get(
+                f"{self.base_url}{PINCODE_ENDPOINT}",
+                params={
+                    "limit": 50,
+                    "filters[0][field]": "pincode",
+                    "filters[0][value]": self.pincode,
+                    "filters[0][operator]": "regex",
+                },
+                timeout=HTTP_TIMEOUT
+            )
+            response.raise_for_status()
+
+            for record in response.json().get("records", []):
+                if str(record.get("pincode")) == self.pincode and record.get("substore"):
+                    self.substore = record["substore"]
+                    self.logger.info(f"✓ Pincode {self.pincode} maps to substore: {self.substore}")
+                    return True
+
+            self.logger.error(f"✗ No substore found for pincode {self.pincode}")
+            return False
+
+        except requests.exceptions.RequestException as e:
+            self.logger.error(f"✗ Error looking up pincode ({self.note_failure(e, 'pincode_lookup')}): {e}")
+            return False
+        except ValueError as e:
+            self.logger.error(f"✗ Invalid pincode response ({self.note_failure(e, 'pincode_lookup')}): {e}")
+            return False
+
+    @timed_step("set_location")
+    @retry_step("set_location")
+    def set_preferences(self):
+        """Store the substore as the session's delivery location"""
+        try:
+            self.throttle()
+            response = self.session.put(
+                f"{self.base_url}{PREFERENCES_ENDPOINT}",
+                json={"data": {"store": self.substore}},
+                timeout=HTTP_TIMEOUT
+            )
+            response.raise_for_status()
+            self.logger.info(f"✓ Delivery location set to substore: {self.substore}")
+            return True
+
+        except requests.exceptions.RequestException as e:
+            self.logger.error(f"✗ Error setting delivery location ({self.note_failure(e, 'set_location')}): {e}")
+            return False
+
+    def request_product(self, headers=None):
+        """Request the product data for the current product URL and return the raw response"""
+        alias = product_alias(self.product_url)
+        self.logger.info(f"🌐 Fetching product data: {alias}")
+        self.throttle()
+        return self.session.get(
+            f"{self.base_url}{PRODUCTS_ENDPOINT}",
+            params={
+                "fields[name]": 1,
+                "fields[alias]": 1,
+                "fields[available]": 1,
+                "fields[inventory_quantity]": 1,
+                "fields[price]": 1,
+                "fields[compare_price]": 1,
+                "fields[max_order_qty]": 1,
+                "q": json.dumps({"alias": alias}),
+                "limit": 1,
+                "substore": self.substore,
+            },
+            headers=headers,
+            timeout=HTTP_TIMEOUT
+        )
+
+    def fetch_product(self):
+        """Fetch the product record for the current product URL, or None if not listed"""
+        response = self.request_product()
+        response.raise_for_status()
+        records = response.json().get("data", [])
+        return records[0] if records else None
+
+    @timed_step("stock_read")
+    @retry_step("stock_read")
+    def check_stock_status(self):
+        """Read the stock status, price and order limit from the product record as a StockResult"""
+        try:
+            product = self.fetch_product()
+
+            if product is None:
+                self.logger.warning("⚠️ Product not listed for this substore")
+                return StockResult("UNKNOWN")
+
+            available = product.get("available")
+            quantity = product.get("inventory_quantity")
+            if available is None or quantity is None:
+                self.logger.warning(f"⚠️ Product record has unexpected content: {product}")
+                return StockResult("UNKNOWN")
+
+            self.product_name, variant = split_product_name(product.get("name") or product_alias(self.product_url))
+            result = StockResult(
+                status="SOLD_OUT" if not available or quantity <= 0 else "IN_STOCK",
+                # The product record is the shop's own answer
+                confidence=1.0,
+                product_name=self.product_name,
+                variant=variant,
+                price=parse_price(product.get("price")),
+                mrp=parse_price(product.get("compare_price")),
+                max_quantity=product.get("max_order_qty"),
+            )
+            if result.status == "SOLD_OUT":
+                self.logger.info("❌ Product Status: SOLD OUT")
+            else:
+                self.logger.info("✅ Product Status: IN STOCK")
+                self.logger.info(f"Inventory quantity: {quantity}")
+            return result
+
+        except requests.exceptions.RequestException as e:
+            self.logger.error(f"✗ Error fetching product data ({self.note_failure(e, 'stock_read')}): {e}")
+            return StockResult("ERROR")
+        except ValueError as e:
+            self.logger.error(f"✗ Invalid product response ({self.note_failure(e, 'stock_read')}): {e}")
+            return StockResult("ERROR")
+
+    def run_stock_check(self):
+        """Run the complete stock checking process"""
+        self.logger.info("🚀 Starting Amul Product Stock Check (http engine)")
+        self.logger.info("=" * 50)
+        self.step_timings = {}
+        self.product_name = None
+        self.failure = None
+
+        try:
+            # Step 1: Resolve pincode to substore
+            if not self.lookup_substore():
+                self.record_result("ERROR")
+                return False
+
+            # Step 2: Set delivery location
+            if not self.set_preferences():
+                self.record_result("ERROR")
+                return False
+
+            # Step 3: Check stock status
+            result = self.check_stock_status()
+
+            # Step 4: Save status and send notifications
+            self.record_result(result)
+
+            self.logger.info("=" * 50)
+            self.logger.info(f"🎯 FINAL RESULT: {result.status}")
+
+            return result.status != "ERROR"
+
+        except Exception as e:
+            self.logger.error(f"✗ Unexpected error during stock check ({self.note_failure(e, None)}): {e}")
+            return False
+
+        finally:
+            self.logger.info(f"⏱️ Step timings: {format_timings(self.step_timings)}", extra={"timings": self.step_timings})
+            self.cleanup()
+
+    def check_batch(self, pairs):
+        """Check every (product_url, pincode) pair, setting each pincode only once"""
+        results = []
+
+        for pincode, product_urls in group_by_pincode(pairs).items():
+            self.pincode = pincode
+            self.logger.info(f"📍 Checking {len(product_urls)} product(s) for pincode: {pincode}")
+            self.step_timings = {}
+            pincode_selected = pincode == self.selected_pincode or (self.lookup_substore() and self.set_preferences())
+            self.selected_pincode = pincode if pincode_selected else None
+
+            for product_url in product_urls:
+                self.product_url = product_url
+                self.product_name = None
+                result = self.check_stock_status() if pincode_selected else StockResult("ERROR")
+                status = result.status
+                self.logger.info(f"🎯 {product_url} @ {pincode}: {status} ({format_timings(self.step_timings)})",
+                                 extra={"product_url": product_url, "pincode": pincode, "status": status,
+                                        "timings": self.step_timings})
+                results.append(self.record_result(result))
+                self.step_timings = {}
+
+        return results
+
+    def cleanup(self):
+        """Clean up resources"""
+        self.close_shared()
+        try:
+            self.session.close()
+            self.logger.info("🧹 HTTP session closed successfully \n\n")
+        except Exception as e:
+            self.logger.error(f"⚠️ Error during cleanup: {e}")
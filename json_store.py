@@ -0,0 +1,42 @@
+# json_store.py
+import json
+import os
+import threading
+
+try:
+    import fcntl
+except ImportError:  # Windows: only threads are serialized
+    fcntl = None
+
+# Serializes read-modify-write of the JSON files between the threads of this process
+thread_lock = threading.Lock()
+
+
+def load_json(path):
+    """Return the JSON object saved at path, or {} if there is none (or it is unreadable)"""
+    try:
+        with open(path, "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def update_json(path, change):
+    """Read-modify-write the JSON object at path; returns what change(data) returned
+
+    change() edits the loaded object in place. The whole update holds a
+    thread lock and an flock on "<path>.lock", so concurrent threads and
+    processes (cron runs, workers, the coordinator) never lose each other's
+    updates. The file is replaced atomically, so readers never see half of it.
+    """
+    with thread_lock, open(f"{path}.lock", "a") as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        data = load_json(path)
+        result = change(data)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(data, f, indent=2)
+        os.replace(tmp_path, path)
+        # Closing the lock file releases the flock
+        return result
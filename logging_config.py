@@ -0,0 +1,138 @@
+# logging_config.py
+import atexit
+import glob
+import gzip
+import json
+import logging
+import os
+import queue
+import shutil
+import stat
+import sys
+from datetime import datetime, date
+from logging.handlers import QueueHandler, QueueListener, WatchedFileHandler
+from config import LOG_FORMAT, LOG_FILE, LOG_MAX_BYTES, LOG_MAX_TOTAL_MB
+
+TEXT_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+# Attributes every LogRecord has; anything else was passed with extra={...}
+STANDARD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+
+class JsonFormatter(logging.Formatter):
+    """Formats each record as one JSON object, including fields passed with extra={...}"""
+
+    def format(self, record):
+        entry = {
+            "time": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        entry.update({key: value for key, value in vars(record).items() if key not in STANDARD_ATTRIBUTES})
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class RotatingLogHandler(WatchedFileHandler):
+    """Log file rotated when it passes max_bytes or on the first write of a new day
+
+    Rotated segments are gzipped next to the log file
+    (amul_stock_checker.log.20250101-120000.gz) and the oldest are deleted
+    once the log and its segments use more than max_total_bytes. Several
+    processes may share the file: whichever rotates first wins, and the
+    others reopen the new file (as WatchedFileHandler does).
+    """
+
+    def __init__(self, filename, max_bytes=LOG_MAX_BYTES, max_total_bytes=LOG_MAX_TOTAL_MB * 1024 * 1024):
+        super().__init__(filename, encoding="utf-8")
+        self.max_bytes = max_bytes
+        self.max_total_bytes = max_total_bytes
+
+    def should_rollover(self):
+        try:
+            st = os.stat(self.baseFilename)
+        except FileNotFoundError:
+            return False
+        # Never rotate /dev/null, pipes and the like
+        if not stat.S_ISREG(st.st_mode) or st.st_size == 0:
+            return False
+        return st.st_size >= self.max_bytes or date.fromtimestamp(st.st_mtime) != date.today()
+
+    def rollover(self):
+        """Move the current log aside, compress it and prune old segments"""
+        if self.stream:
+            self.stream.close()
+            self.stream = None
+        stamp = f"{self.baseFilename}.{datetime.now().strftime('%Y%m%d-%H%M%S')}"
+        segment, counter = stamp, 0
+        while os.path.exists(segment) or os.path.exists(f"{segment}.gz"):
+            counter += 1
+            segment = f"{stamp}-{counter}"
+        try:
+            os.rename(self.baseFilename, segment)
+        except FileNotFoundError:
+            # Another process rotated it first
+            return
+        with open(segment, "rb") as source, gzip.open(f"{segment}.gz", "wb") as target:
+            shutil.copyfileobj(source, target)
+        os.remove(segment)
+        self.prune()
+
+    def prune(self):
+        """Delete the oldest compressed segments while the logs use more than max_total_bytes"""
+        segments = sorted(glob.glob(f"{glob.escape(self.baseFilename)}.*.gz"), key=os.path.getmtime)
+        sizes = {segment: os.path.getsize(segment) for segment in segments}
+        total = sum(sizes.values())
+        if os.path.exists(self.baseFilename):
+            total += os.path.getsize(self.baseFilename)
+        for segment in segments:
+            if total <= self.max_total_bytes:
+                break
+            os.remove(segment)
+            total -= sizes[segment]
+
+    def emit(self, record):
+        try:
+            if self.should_rollover():
+                self.rollover()
+        except Exception:
+            self.handleError(record)
+        # Reopens the file if it was rotated (here or by another process)
+        super().emit(record)
+
+
+def log_uncaught_exception(exc_type, exc_value, exc_traceback):
+    if not issubclass(exc_type, KeyboardInterrupt):
+        logging.getLogger(__name__).critical("💥 Uncaught exception", exc_info=(exc_type, exc_value, exc_traceback))
+    sys.__excepthook__(exc_type, exc_value, exc_traceback)
+
+
+def configure_logging(log_file=None, log_format=LOG_FORMAT, console=True):
+    """Log to the rotating log file (or log_file) and, with console, to stdout
+
+    Records are only put on a queue by the calling thread; a listener thread
+    formats and writes them, so checks never wait for log I/O. Only the first
+    call configures logging; later calls (e.g. from every checker) keep the
+    configuration main() chose.
+    """
+    root = logging.getLogger()
+    if root.handlers:
+        return
+
+    formatter = JsonFormatter() if log_format == "json" else logging.Formatter(TEXT_FORMAT)
+    handlers = [RotatingLogHandler(log_file or LOG_FILE)]
+    if console:
+        handlers.append(logging.StreamHandler(sys.stdout))
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    log_queue = queue.SimpleQueue()
+    listener = QueueListener(log_queue, *handlers)
+    listener.start()
+    # Write out whatever is still queued when the process exits
+    atexit.register(listener.stop)
+
+    root.addHandler(QueueHandler(log_queue))
+    root.setLevel(logging.INFO)
+    sys.excepthook = log_uncaught_exception
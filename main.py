@@ -6,76 +6,384 @@ Can be run as a one-time check or scheduled with cron
 """
 
 import argparse
-from checker import AmulStockChecker
 import sys
 import os
-import json
-from cron import setup_cron_job, remove_cron_job
+import time
+from datetime import datetime
+from config import (
+    WATCHLIST_FILE, PRODUCT_URL, PINCODE, DAEMON_INTERVAL, DAEMON_JITTER, HISTORY_DB, STATUS_HISTORY_DAYS,
+    ADAPTIVE_BUDGET_PER_MINUTE, SHOP_RATE_LIMIT_PER_MINUTE, DRIVER_PROFILES, DRIVER_PROFILE, METRICS_PORT,
+    METRICS_TEXTFILE, LOG_FORMAT, CLUSTER_QUEUE_DB, PRICE_DROP_ALERT_PERCENT, SCHEDULE_INTERVAL_MINUTES
+)
+
+# Modules are imported by the functions that need them, so each command
+# only pays for its own imports (e.g. --status never loads Selenium);
+# benchmarks/startup.py measures the difference.
+
+def format_duration(seconds):
+    """Format a duration in seconds as e.g. "2d 3h", "3h 5m" or "4m" """
+    minutes = int(seconds // 60)
+    days, minutes = divmod(minutes, 24 * 60)
+    hours, minutes = divmod(minutes, 60)
+    if days:
+        return f"{days}d {hours}h"
+    if hours:
+        return f"{hours}h {minutes}m"
+    return f"{minutes}m"
+
+def format_time(ts):
+    return datetime.fromtimestamp(ts).strftime("%Y-%m-%d %H:%M")
+
+def format_details(latest):
+    """Format the last known price, MRP, discount, order limit and pack variant of a status"""
+    from extraction import StockResult, format_price
+    result = StockResult(latest["status"], price=latest["price"], mrp=latest["mrp"])
+    details = []
+    if latest["price"] is not None:
+        details.append(f"Price: {format_price(latest['price'])}")
+    if result.discount_percent:
+        details.append(f"MRP: {format_price(latest['mrp'])} ({result.discount_percent:g}% off)")
+    if latest["max_quantity"] is not None:
+        details.append(f"Max {latest['max_quantity']} per order")
+    if latest["variant"]:
+        details.append(f"Variant: {latest['variant']}")
+    return ", ".join(details)
+
+def show_status(days=STATUS_HISTORY_DAYS):
+    """Show the latest status and restock history of every checked product"""
+    if not os.path.exists(HISTORY_DB):
+        print("❌ No stock history found. Run a stock check first.")
+        return
+
+    from history import StockHistory
 
-def show_status():
-    """Show the current stock status from the saved file"""
-    status_file = "amul_stock_status.json"
-    
     try:
-        if os.path.exists(status_file):
-            with open(status_file, "r") as f:
-                data = json.load(f)
-            
-            print("📊 Current Stock Status:")
-            print(f"  Status: {data['status']}")
-            print(f"  Pincode: {data['pincode']}")
-            print(f"  Last Checked: {data['timestamp']}")
-            print(f"  Product URL: {data['product_url']}")
-        else:
-            print("❌ No status file found. Run a stock check first.")
-            
+        history = StockHistory(HISTORY_DB)
+        now = time.time()
+        since = now - days * 86400
+
+        print("📊 Current Stock Status:")
+        for latest in history.all_latest():
+            print(f"\n  📦 {latest['product_url']} @ {latest['pincode']}")
+            if latest["stock_status"]:
+                streak = format_duration(now - latest["stock_since"])
+                print(f"  Status: {latest['stock_status']} (for {streak}, since {format_time(latest['stock_since'])})")
+            if latest["status"] != latest["stock_status"]:
+                print(f"  Last Check Result: {latest['status']}")
+            print(f"  Last Checked: {format_time(latest['timestamp'])} ({latest['samples']} checks recorded)")
+            details = format_details(latest)
+            if details:
+                print(f"  {details}")
+
+            periods = history.in_stock_periods(latest["product_url"], latest["pincode"], since=since)
+            in_stock_seconds = sum((end or now) - max(start, since) for start, end in periods)
+            # A period already running when the window opened is not a restock within it
+            restocks = sum(1 for start, _ in periods if start >= since)
+            print(f"  Restocks (last {days} days): {restocks}, in stock for {format_duration(in_stock_seconds)}")
+            for start, end in periods[-5:]:
+                until = format_time(end) if end else "now"
+                print(f"    {format_time(start)} → {until} ({format_duration((end or now) - start)})")
+
+        history.close()
+
     except Exception as e:
         print(f"❌ Error reading status: {e}")
 
+def create_engine_checker(args, headless, notifier=None, history=None):
+    """Create the stock checker for the selected engine"""
+    if args.workers:
+        from parallel import ParallelChecker
+        checker = ParallelChecker(args.workers, engine=args.engine, headless=headless, profile=args.driver_profile,
+                                  log_file=args.log_file, log_format=args.log_format, console=not args.cron,
+                                  base_url=args.base_url, rate_per_minute=args.rate_limit,
+                                  notifier=notifier, history=history)
+    elif args.engine == 'http':
+        from http_checker import AmulHttpChecker
+        checker = AmulHttpChecker(log_file=args.log_file, base_url=args.base_url, notifier=notifier, history=history)
+    elif args.pool_size:
+        from driver_pool import DriverPool, PooledStockChecker
+        pool = DriverPool(size=args.pool_size, headless=headless, profile=args.driver_profile)
+        checker = PooledStockChecker(pool, log_file=args.log_file, notifier=notifier, history=history)
+        checker.pool.start()
+    else:
+        from checker import AmulStockChecker
+        checker = AmulStockChecker(headless=headless, log_file=args.log_file, profile=args.driver_profile,
+                                   notifier=notifier, history=history)
+    checker.price_drop_percent = args.price_drop_alert
+    return checker
+
+def create_checker(args, headless):
+    """Create the stock checker, behind the fast path if enabled"""
+    if args.fast_path:
+        from fastpath import FastPathChecker
+        checker = FastPathChecker(
+            lambda notifier, history: create_engine_checker(args, headless, notifier, history),
+            log_file=args.log_file,
+            base_url=args.base_url
+        )
+        checker.price_drop_percent = args.price_drop_alert
+        return checker
+    return create_engine_checker(args, headless)
+
+def create_worker_checker(args, headless):
+    """Create a checker that only returns its results (the coordinator stores them)"""
+    if args.engine == 'http':
+        from http_checker import AmulHttpChecker
+        return AmulHttpChecker(log_file=args.log_file, base_url=args.base_url, record_results=False)
+    from checker import AmulStockChecker
+    return AmulStockChecker(headless=headless, log_file=args.log_file, profile=args.driver_profile,
+                            record_results=False)
+
+def load_entries(args):
+    """Load the watchlist entries to schedule, or the configured product and pincode"""
+    if not args.watchlist:
+        return [{"product_url": PRODUCT_URL, "pincode": PINCODE, "interval": None}]
+    from watchlist import load_watchlist_entries
+    try:
+        return load_watchlist_entries(args.watchlist)
+    except (OSError, ValueError) as e:
+        print(f"❌ Could not load watchlist: {e}")
+        sys.exit(1)
+
+def start_metrics_server(args):
+    """Serve /metrics (with every SKU's last success) if --metrics-port is set"""
+    if not args.metrics_port:
+        return None
+    from history import StockHistory
+    from metrics import REGISTRY, MetricsServer, sku_success_collector
+    REGISTRY.add_collector(sku_success_collector(StockHistory(HISTORY_DB)))
+    metrics_server = MetricsServer(port=args.metrics_port).start()
+    print(f"📈 Metrics served on {metrics_server.url}")
+    return metrics_server
+
+def create_policy(args, entries):
+    """Create the adaptive interval policy if --adaptive is set"""
+    if not args.adaptive:
+        return None
+    from adaptive import AdaptiveScheduler
+    from history import StockHistory
+    return AdaptiveScheduler(
+        StockHistory(HISTORY_DB),
+        entries,
+        base_interval=args.interval,
+        budget_per_minute=args.budget
+    )
+
+def run_coordinator(args):
+    """Queue the watchlist's checks for the workers and store their results until SIGTERM/SIGINT"""
+    from cluster import WorkQueue, ClusterCoordinator
+    metrics_server = start_metrics_server(args)
+    entries = load_entries(args)
+    coordinator = ClusterCoordinator(
+        WorkQueue(args.queue),
+        entries,
+        interval=args.interval,
+        jitter=args.jitter,
+        policy=create_policy(args, entries),
+        log_file=args.log_file
+    )
+    coordinator.price_drop_percent = args.price_drop_alert
+    try:
+        coordinator.run()
+    finally:
+        if metrics_server is not None:
+            metrics_server.stop()
+
+def run_worker(args, headless):
+    """Check shards claimed from the coordinator's queue until SIGTERM/SIGINT"""
+    from cluster import WorkQueue, ClusterWorker
+    worker = ClusterWorker(
+        WorkQueue(args.queue),
+        checker_factory=lambda: create_worker_checker(args, headless),
+        worker_id=args.worker_id
+    )
+    worker.run()
+
+def run_daemon(args, headless):
+    """Run the long-lived scheduler until SIGTERM/SIGINT"""
+    from daemon import StockDaemon
+    entries = load_entries(args)
+    policy = create_policy(args, entries)
+    metrics_server = start_metrics_server(args)
+
+    daemon = StockDaemon(
+        checker_factory=lambda: create_checker(args, headless),
+        entries=entries,
+        interval=args.interval,
+        jitter=args.jitter,
+        policy=policy
+    )
+    try:
+        daemon.run()
+    finally:
+        if metrics_server is not None:
+            metrics_server.stop()
+
+def acquire_run_lock():
+    """Take the single-instance lock of scheduled runs; None if another run still holds it"""
+    import logging
+    import signal
+    from scheduler import RunLock
+    logger = logging.getLogger("main")
+    lock = RunLock()
+    if lock.acquire():
+        # SIGTERM (e.g. from a later run that found this one hung) unwinds through cleanup(), closing Chrome
+        signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(128 + signum))
+        return lock
+    pid, age = lock.stop_stale_holder()
+    if pid is None:
+        logger.info("⏭️ Previous scheduled run is still checking - skipping this one")
+    else:
+        logger.warning(f"🔒 Scheduled run {pid} has held the lock for {format_duration(age)} - stopping it")
+    return None
+
+def dump_metrics(path):
+    """Write this run's metrics (and every SKU's last success) to a textfile"""
+    from history import StockHistory
+    from metrics import REGISTRY, sku_success_collector, write_textfile
+    history = StockHistory(HISTORY_DB)
+    REGISTRY.add_collector(sku_success_collector(history))
+    try:
+        write_textfile(path)
+    except OSError as e:
+        print(f"⚠️ Could not write metrics to {path}: {e}")
+    finally:
+        history.close()
+
+def run_checks(args, headless, pairs):
+    """Run the one-shot check of the configured product or the watchlist pairs"""
+    if not args.cron and pairs:
+        print("Amul Product Stock Checker (batch)")
+        print(f"Checking {len(pairs)} product/pincode pair(s) from: {args.watchlist}")
+        print("-" * 50)
+    elif not args.cron:
+        print("Amul Chocolate Whey Protein Stock Checker")
+        print("Checking stock for pincode: 641014")
+        print("-" * 50)
+    
+    # Don't spend a browser on a shop host that is known to be down
+    from resilience import CircuitBreaker
+    allowed_pairs = CircuitBreaker().allowed_pairs(pairs or [(PRODUCT_URL, PINCODE)])
+    if not allowed_pairs:
+        if not args.cron:
+            print("\n⏸️ Checks are paused while the shop keeps failing (circuit breaker open)")
+        return
+    if pairs:
+        pairs = allowed_pairs
+
+    # Run the stock checker
+    try:
+        checker = create_checker(args, headless)
+    except Exception:
+        # The checker already logged why
+        if not args.cron:
+            print("\n❌ Could not start the stock checker")
+        sys.exit(1)
+    
+    if pairs:
+        success = checker.run_batch_check(pairs)
+    else:
+        success = checker.run_stock_check()
+
+    if args.cron:
+        dump_metrics(args.metrics_file)
+    
+    if not success:
+        if not args.cron:
+            print("\n❌ Stock check failed due to errors")
+        sys.exit(1)
+    else:
+        if not args.cron:
+            print("\n✅ Stock check completed successfully")
+
 def main():
     """Main function to run the stock checker"""
     parser = argparse.ArgumentParser(description='Amul Product Stock Checker with Cron Integration')
     parser.add_argument('--cron', action='store_true', help='Run in cron mode (headless, minimal output)')
-    parser.add_argument('--setup-cron', action='store_true', help='Setup cron job to run every 5 minutes')
-    parser.add_argument('--remove-cron', action='store_true', help='Remove the cron job')
-    parser.add_argument('--status', action='store_true', help='Show current stock status')
+    parser.add_argument('--setup-cron', action='store_true', help=f'Schedule a --cron run every {SCHEDULE_INTERVAL_MINUTES} minute(s) with the current Python and project path')
+    parser.add_argument('--remove-cron', action='store_true', help='Remove the scheduled run (from cron and systemd unless --scheduler is given)')
+    parser.add_argument('--scheduler', choices=['cron', 'systemd'], help='--setup-cron/--remove-cron: install a crontab line (default) or a systemd user timer')
+    parser.add_argument('--status', action='store_true', help='Show current stock status and restock history')
     parser.add_argument('--headless', action='store_true', help='Run in headless mode')
     parser.add_argument('--log-file', type=str, help='Custom log file path')
+    parser.add_argument('--engine', choices=['selenium', 'http'], default='selenium', help='Stock check engine (http skips the browser)')
+    parser.add_argument('--watchlist', nargs='?', const=WATCHLIST_FILE, help=f'Batch-check every product x pincode in a watchlist file (default: {WATCHLIST_FILE})')
+    parser.add_argument('--daemon', action='store_true', help='Run continuously, keeping the browser/session warm between checks')
+    parser.add_argument('--interval', type=float, default=DAEMON_INTERVAL, help=f'Daemon: seconds between checks of a product (default: {DAEMON_INTERVAL})')
+    parser.add_argument('--jitter', type=float, default=DAEMON_JITTER, help=f'Daemon: random +/- fraction added to each interval (default: {DAEMON_JITTER})')
+    parser.add_argument('--adaptive', action='store_true', help='Daemon/coordinator: poll harder around each product\'s usual restock times, back off otherwise')
+    parser.add_argument('--budget', type=float, default=ADAPTIVE_BUDGET_PER_MINUTE, help=f'Adaptive daemon/coordinator: max page loads per minute across all products (default: {ADAPTIVE_BUDGET_PER_MINUTE})')
+    parser.add_argument('--driver-profile', choices=DRIVER_PROFILES, default=DRIVER_PROFILE, help=f'Selenium: "lean" skips images, media, fonts and trackers (default: {DRIVER_PROFILE})')
+    parser.add_argument('--pool-size', type=int, help='Selenium: check pincode groups concurrently on this many warm pooled browsers')
+    parser.add_argument('--fast-path', action='store_true', help='Reuse the last result while the product\'s stock data is unchanged, running the full check only on changes')
+    parser.add_argument('--workers', type=int, help='Spread checks over this many worker processes (each with its own browser/session)')
+    parser.add_argument('--rate-limit', type=float, default=SHOP_RATE_LIMIT_PER_MINUTE, help=f'Workers: max requests per minute to the shop across all workers (default: {SHOP_RATE_LIMIT_PER_MINUTE})')
+    parser.add_argument('--coordinator', action='store_true', help='Queue the watchlist\'s checks for --worker processes (on any node) and store their results')
+    parser.add_argument('--worker', action='store_true', help='Check shards claimed from the coordinator\'s queue')
+    parser.add_argument('--queue', type=str, default=CLUSTER_QUEUE_DB, help=f'Coordinator/worker: shared queue database, on a disk every node can reach (default: {CLUSTER_QUEUE_DB})')
+    parser.add_argument('--worker-id', type=str, help='Worker: name shown in the queue (default: <hostname>-<pid>)')
+    parser.add_argument('--log-format', choices=['text', 'json'], default=LOG_FORMAT, help=f'Log line format (default: {LOG_FORMAT})')
+    parser.add_argument('--metrics-port', type=int, default=METRICS_PORT, help=f'Daemon/coordinator: serve Prometheus metrics on this port, 0 to disable (default: {METRICS_PORT})')
+    parser.add_argument('--metrics-file', type=str, default=METRICS_TEXTFILE, help=f'Cron: write Prometheus metrics to this textfile after the run (default: {METRICS_TEXTFILE})')
+    parser.add_argument('--price-drop-alert', type=float, metavar='PERCENT', default=PRICE_DROP_ALERT_PERCENT, help='Also notify when a product\'s price drops by at least PERCENT since the last check')
+    parser.add_argument('--base-url', type=str, help='Shop base URL for the http engine (e.g. a local stand-in server)')
     
     args = parser.parse_args()
     
     if args.setup_cron:
-        setup_cron_job(os.path.abspath(__file__))
+        from cron import setup_cron_job
+        setup_cron_job(os.path.abspath(__file__), args.scheduler or 'cron')
         return
     
     if args.remove_cron:
-        remove_cron_job(os.path.abspath(__file__))
+        from cron import remove_cron_job
+        remove_cron_job(os.path.abspath(__file__), args.scheduler)
         return
     
     if args.status:
         show_status()
         return
     
+    # Cron runs log to the rotating log file only
+    from logging_config import configure_logging
+    configure_logging(args.log_file, args.log_format, console=not args.cron)
+
     # Determine if running in headless mode
     headless = args.headless or args.cron
     
-    if not args.cron:
-        print("Amul Chocolate Whey Protein Stock Checker")
-        print("Checking stock for pincode: 641014")
-        print("-" * 50)
-    
-    # Run the stock checker
-    checker = AmulStockChecker(headless=headless, log_file=args.log_file)
-    
-    success = checker.run_stock_check()
-    
-    if not success:
-        if not args.cron:
-            print("\n❌ Stock check failed due to errors")
-        sys.exit(1)
-    else:
-        if not args.cron:
-            print("\n✅ Stock check completed successfully")
+    if args.daemon:
+        run_daemon(args, headless)
+        return
+
+    if args.coordinator:
+        run_coordinator(args)
+        return
+
+    if args.worker:
+        run_worker(args, headless)
+        return
+
+    pairs = None
+    if args.watchlist:
+        from watchlist import load_watchlist
+        try:
+            pairs = load_watchlist(args.watchlist)
+        except (OSError, ValueError) as e:
+            print(f"❌ Could not load watchlist: {e}")
+            sys.exit(1)
+
+    # A slow scheduled run must not overlap the next one (two Chromes, duplicate alerts);
+    # the lock is held until the run has finished
+    run_lock = None
+    if args.cron:
+        run_lock = acquire_run_lock()
+        if run_lock is None:
+            return
+    try:
+        run_checks(args, headless, pairs)
+    finally:
+        if run_lock is not None:
+            run_lock.release()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
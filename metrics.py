@@ -0,0 +1,229 @@
+# metrics.py
+import logging
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from config import METRICS_HOST, METRICS_PORT, METRICS_TEXTFILE
+
+DURATION_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 15, 30, 60)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def format_labels(labels):
+    if not labels:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"') for value in labels.values())
+    return "{" + ",".join(f'{name}="{value}"' for name, value in zip(labels, escaped)) + "}"
+
+
+def format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    """A metric family: one value (or histogram) per combination of label values"""
+
+    type = None
+
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.values = {}
+        self.lock = threading.Lock()
+
+    def key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def samples(self):
+        """Yield (name suffix, labels dict, value) for every sample"""
+        with self.lock:
+            items = list(self.values.items())
+        for key, value in items:
+            yield "", dict(zip(self.labelnames, key)), value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type}"]
+        for suffix, labels, value in self.samples():
+            lines.append(f"{self.name}{suffix}{format_labels(labels)} {format_value(value)}")
+        return lines
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self.key(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    type = "gauge"
+
+    def set(self, value, **labels):
+        key = self.key(labels)
+        with self.lock:
+            self.values[key] = value
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(self, name, help, labelnames=(), buckets=DURATION_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(buckets) + (float("inf"),)
+
+    def observe(self, value, **labels):
+        key = self.key(labels)
+        with self.lock:
+            counts, total = self.values.get(key, ([0] * len(self.buckets), 0.0))
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[index] += 1
+            self.values[key] = (counts, total + value)
+
+    def samples(self):
+        for _, labels, (counts, total) in super().samples():
+            for bound, count in zip(self.buckets, counts):
+                yield "_bucket", {**labels, "le": format_value(bound)}, count
+            yield "_sum", labels, total
+            yield "_count", labels, counts[-1]
+
+
+class MetricsRegistry:
+    """All metric families of this process, rendered in the Prometheus text format
+
+    Collectors are functions returning extra metric families computed at
+    scrape time (e.g. from the history store).
+    """
+
+    def __init__(self):
+        self.metrics = []
+        self.collectors = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def counter(self, name, help, labelnames=()):
+        return self.register(Counter(name, help, labelnames))
+
+    def histogram(self, name, help, labelnames=(), buckets=DURATION_BUCKETS):
+        return self.register(Histogram(name, help, labelnames, buckets))
+
+    def add_collector(self, collector):
+        self.collectors.append(collector)
+
+    def render(self):
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        for collector in self.collectors:
+            try:
+                for metric in collector():
+                    lines.extend(metric.render())
+            except Exception as e:
+                logging.getLogger(__name__).warning(f"⚠️ Metrics collector failed: {e}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+STEP_DURATION = REGISTRY.histogram(
+    "amul_check_step_duration_seconds", "Duration of each stock check pipeline step", ["step"])
+CHECK_DURATION = REGISTRY.histogram(
+    "amul_check_duration_seconds", "Total duration of the timed steps of a stock check")
+CHECKS = REGISTRY.counter(
+    "amul_checks_total", "Stock checks by resulting status", ["status"])
+DRIVER_LAUNCH = REGISTRY.histogram(
+    "amul_driver_launch_seconds", "Time to launch a Chrome driver")
+NOTIFICATION_DURATION = REGISTRY.histogram(
+    "amul_notification_duration_seconds", "Time to deliver a notification, including retries", ["channel"])
+NOTIFICATION_FAILURES = REGISTRY.counter(
+    "amul_notification_failures_total", "Failed notification delivery attempts", ["channel"])
+CHECK_FAILURES = REGISTRY.counter(
+    "amul_check_failures_total", "Failed (ERROR) stock checks by cause", ["cause"])
+STEP_RETRIES = REGISTRY.counter(
+    "amul_step_retries_total", "Pipeline steps retried after a transient failure", ["step", "cause"])
+CIRCUIT_TRANSITIONS = REGISTRY.counter(
+    "amul_circuit_breaker_transitions_total", "Shop host circuit breaker openings and recoveries", ["state"])
+
+
+def observe_record(record):
+    """Count a check result and its step timings"""
+    CHECKS.inc(status=record["status"])
+    if record["status"] == "ERROR":
+        CHECK_FAILURES.inc(cause=record.get("failure") or "unknown")
+    for step, seconds in record.get("timings", {}).items():
+        STEP_DURATION.observe(seconds, step=step)
+    if record.get("timings"):
+        CHECK_DURATION.observe(sum(record["timings"].values()))
+
+
+def sku_success_collector(history):
+    """Collector exporting when each SKU was last checked successfully (anything but ERROR)"""
+    def collect():
+        now = time.time()
+        last_success = Gauge("amul_sku_last_success_timestamp_seconds",
+                             "Unix time of the last successful check of a product and pincode",
+                             ["product_url", "pincode"])
+        since_success = Gauge("amul_sku_seconds_since_last_success",
+                              "Seconds since the last successful check of a product and pincode",
+                              ["product_url", "pincode"])
+        for (product_url, pincode), ts in history.last_success_times().items():
+            last_success.set(ts, product_url=product_url, pincode=pincode)
+            since_success.set(round(now - ts, 3), product_url=product_url, pincode=pincode)
+        return [last_success, since_success]
+    return collect
+
+
+def write_textfile(path=METRICS_TEXTFILE, registry=REGISTRY):
+    """Write the metrics to a file for node_exporter's textfile collector (atomically)"""
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        f.write(registry.render())
+    os.replace(tmp_path, path)
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = self.server.registry.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class MetricsServer:
+    """Serves /metrics on a background thread"""
+
+    def __init__(self, host=METRICS_HOST, port=METRICS_PORT, registry=REGISTRY):
+        self.httpd = ThreadingHTTPServer((host, port), MetricsHandler)
+        self.httpd.registry = registry
+        self.thread = threading.Thread(target=self.httpd.serve_forever, name="metrics", daemon=True)
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/metrics"
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
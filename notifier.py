@@ -1,31 +1,188 @@
 # notifier.py
-import os
+import asyncio
+import random
+import threading
+import time
 import requests
 import logging
+from config import (
+    NTFY_SERVER, NTFY_TOPIC, TELEGRAM_API_URL, TELEGRAM_BOT_TOKEN, TELEGRAM_CHAT_ID,
+    WEBHOOK_URL, NOTIFY_CHANNELS, NOTIFY_TIMEOUT, NOTIFY_RETRIES, NOTIFY_BACKOFF
+)
+from metrics import NOTIFICATION_DURATION, NOTIFICATION_FAILURES
 
-def send_ntfy_notification(logger, ntfy_url, message,ntfy_topic, title="Amul Stock Alert", priority="high"):
-        """Send notification via ntfy.sh"""
-        try:
-            headers = {
-                "Title": title,  # still fine for most clients
+
+class NotificationChannel:
+    """Base class for a notification channel with its own pooled HTTP session"""
+
+    name = "channel"
+
+    def __init__(self, timeout=NOTIFY_TIMEOUT):
+        self.timeout = timeout
+        self.session = requests.Session()
+
+    def send(self, title, message, events):
+        """Deliver one (possibly coalesced) message; raises on failure so the dispatcher can retry"""
+        raise NotImplementedError
+
+    def close(self):
+        self.session.close()
+
+
+class NtfyChannel(NotificationChannel):
+    """Push notifications through an ntfy server topic"""
+
+    name = "ntfy"
+
+    def __init__(self, server=NTFY_SERVER, topic=NTFY_TOPIC, priority="high", **kwargs):
+        super().__init__(**kwargs)
+        self.url = f"{server.rstrip('/')}/{topic}"
+        self.priority = priority
+
+    def send(self, title, message, events):
+        response = self.session.post(
+            self.url,
+            data=message.encode('utf-8'),
+            headers={
+                "Title": title,
                 "Content-Type": "text/plain; charset=utf-8",
-                "X-Priority": priority,  # ntfy.sh expects X-Priority
+                "X-Priority": self.priority,
                 "X-Tags": "shopping,amul,stock"
-            }
-
-            response = requests.post(
-                ntfy_url,
-                data=message.encode('utf-8'),
-                headers=headers,
-                timeout=10
-            )
-
-            if response.status_code == 200:
-                logger.info(f"📱 Notification sent successfully to {ntfy_topic}")
-            else:
-                logger.error(f"❌ Failed to send notification: HTTP {response.status_code}")
-
-        except requests.exceptions.RequestException as e:
-            logger.error(f"❌ Error sending notification: {e}")
-        except Exception as e:
-            logger.error(f"❌ Unexpected error sending notification: {e}")
+            },
+            timeout=self.timeout
+        )
+        response.raise_for_status()
+
+
+class TelegramChannel(NotificationChannel):
+    """Messages from a Telegram bot to one chat"""
+
+    name = "telegram"
+
+    def __init__(self, bot_token=TELEGRAM_BOT_TOKEN, chat_id=TELEGRAM_CHAT_ID, api_url=TELEGRAM_API_URL, **kwargs):
+        super().__init__(**kwargs)
+        self.url = f"{api_url.rstrip('/')}/bot{bot_token}/sendMessage"
+        self.chat_id = chat_id
+
+    def send(self, title, message, events):
+        response = self.session.post(
+            self.url,
+            json={"chat_id": self.chat_id, "text": f"{title}\n\n{message}", "disable_web_page_preview": True},
+            timeout=self.timeout
+        )
+        response.raise_for_status()
+
+
+class WebhookChannel(NotificationChannel):
+    """JSON POST to a generic webhook"""
+
+    name = "webhook"
+
+    def __init__(self, url=WEBHOOK_URL, **kwargs):
+        super().__init__(**kwargs)
+        self.url = url
+
+    def send(self, title, message, events):
+        response = self.session.post(
+            self.url,
+            json={"title": title, "message": message, "events": list(events)},
+            timeout=self.timeout
+        )
+        response.raise_for_status()
+
+
+def coalesce_events(events):
+    """Combine a cycle's events into one (title, message) pair"""
+    if len(events) == 1:
+        return events[0]["title"], events[0]["message"]
+    lines = [f"- {event['message']}" for event in events]
+    return f"Amul Stock Alert ({len(events)} updates)", "\n".join(lines)
+
+
+class NotificationDispatcher:
+    """Non-blocking notification queue delivering through several channels
+
+    notify() only buffers an event, so a slow channel never stalls a stock
+    check. flush() coalesces the buffered events into one message per
+    channel and hands them to an asyncio loop running on a background
+    thread, where each channel retries with exponential backoff.
+    """
+
+    def __init__(self, channels, retries=NOTIFY_RETRIES, backoff=NOTIFY_BACKOFF, logger=None):
+        self.channels = channels
+        self.retries = retries
+        self.backoff = backoff
+        self.logger = logger or logging.getLogger(__name__)
+        self.pending = []
+        self.pending_lock = threading.Lock()
+        self.futures = []
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, name="notifier", daemon=True)
+        self.thread.start()
+        # One lock per channel keeps its messages in order on its session
+        self.channel_locks = {channel.name: asyncio.Lock() for channel in channels}
+
+    def notify(self, title, message, **fields):
+        """Buffer an event for the next flush()"""
+        with self.pending_lock:
+            self.pending.append({"title": title, "message": message, **fields})
+
+    def flush(self):
+        """Send the buffered events: one coalesced message per channel"""
+        with self.pending_lock:
+            events, self.pending = self.pending, []
+        if not events or not self.channels:
+            return
+
+        title, message = coalesce_events(events)
+        for channel in self.channels:
+            future = asyncio.run_coroutine_threadsafe(self.deliver(channel, title, message, events), self.loop)
+            self.futures.append(future)
+        self.futures = [future for future in self.futures if not future.done()]
+
+    async def deliver(self, channel, title, message, events):
+        """Send one message through a channel, retrying with backoff"""
+        async with self.channel_locks[channel.name]:
+            started = time.perf_counter()
+            for attempt in range(self.retries + 1):
+                try:
+                    await asyncio.to_thread(channel.send, title, message, events)
+                    NOTIFICATION_DURATION.observe(time.perf_counter() - started, channel=channel.name)
+                    self.logger.info(f"📱 Notification sent via {channel.name} ({len(events)} event(s))")
+                    return True
+                except Exception as e:
+                    NOTIFICATION_FAILURES.inc(channel=channel.name)
+                    if attempt == self.retries:
+                        self.logger.error(f"❌ Giving up on {channel.name} notification after {attempt + 1} attempt(s): {e}")
+                        return False
+                    delay = self.backoff * (2 ** attempt) * random.uniform(0.8, 1.2)
+                    self.logger.warning(f"⚠️ {channel.name} notification failed ({e}), retrying in {delay:.1f}s")
+                    await asyncio.sleep(delay)
+
+    def close(self, timeout=30):
+        """Flush, wait up to timeout seconds for in-flight deliveries, then stop the loop"""
+        self.flush()
+        for future in self.futures:
+            try:
+                future.result(timeout=timeout)
+            except Exception as e:
+                self.logger.error(f"❌ Notification delivery did not finish: {e}")
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(timeout=5)
+        for channel in self.channels:
+            channel.close()
+
+
+def build_channels(names=NOTIFY_CHANNELS):
+    """Create the configured notification channels, skipping unconfigured ones"""
+    channels = []
+    for name in names:
+        if name == "ntfy":
+            channels.append(NtfyChannel())
+        elif name == "telegram" and TELEGRAM_BOT_TOKEN and TELEGRAM_CHAT_ID:
+            channels.append(TelegramChannel())
+        elif name == "webhook" and WEBHOOK_URL:
+            channels.append(WebhookChannel())
+        else:
+            logging.getLogger(__name__).warning(f"⚠️ Notification channel '{name}' is unknown or not configured")
+    return channels
@@ -0,0 +1,148 @@
+# parallel.py
+import math
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.util import Finalize
+from checker_base import StockCheckerBase, error_record
+from config import SHOP_RATE_LIMIT_PER_MINUTE, SHOP_RATE_BURST, DRIVER_PROFILE, LOG_FORMAT
+from logging_config import configure_logging
+from watchlist import group_by_pincode
+
+# The checker of this worker process, created by init_worker()
+worker_checker = None
+
+
+class SharedTokenBucket:
+    """Token bucket rate limiter shared by all worker processes
+
+    Holds at most `burst` tokens and refills at rate_per_minute; every
+    request to the shop takes one token, waiting for a refill if needed.
+    """
+
+    def __init__(self, rate_per_minute, burst, ctx):
+        self.rate = rate_per_minute / 60
+        self.burst = burst
+        self.lock = ctx.Lock()
+        self.tokens = ctx.Value("d", burst, lock=False)
+        self.updated = ctx.Value("d", time.monotonic(), lock=False)
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens.value = min(self.burst, self.tokens.value + (now - self.updated.value) * self.rate)
+                self.updated.value = now
+                if self.tokens.value >= 1:
+                    self.tokens.value -= 1
+                    return
+                wait = (1 - self.tokens.value) / self.rate
+            time.sleep(wait)
+
+
+def init_worker(engine, headless, profile, log_file, log_format, console, base_url, bucket):
+    """Configure this worker process's logging and create its checker; results are stored by the parent"""
+    global worker_checker
+    # Spawned processes start without the logging main() configured
+    configure_logging(log_file, log_format, console)
+    if engine == "http":
+        from http_checker import AmulHttpChecker
+        worker_checker = AmulHttpChecker(log_file=log_file, base_url=base_url, record_results=False)
+    else:
+        from checker import AmulStockChecker
+        worker_checker = AmulStockChecker(headless=headless, log_file=log_file, record_results=False,
+                                          profile=profile)
+    worker_checker.rate_limiter = bucket
+    # Close the browser/session when the pool shuts the worker down
+    Finalize(worker_checker, worker_checker.cleanup, exitpriority=10)
+
+
+def run_task(pairs):
+    """Check one task's pairs in this worker; returns (pid, records, busy seconds)"""
+    started = time.perf_counter()
+    records = worker_checker.check_batch(pairs)
+    return os.getpid(), records, time.perf_counter() - started
+
+
+def split_tasks(pairs, workers):
+    """Split pairs into per-pincode chunks so every worker gets a share of the work"""
+    chunk_size = max(1, math.ceil(len(pairs) / workers))
+    tasks = []
+    for pincode, product_urls in group_by_pincode(pairs).items():
+        for start in range(0, len(product_urls), chunk_size):
+            tasks.append([(product_url, pincode) for product_url in product_urls[start:start + chunk_size]])
+    return tasks
+
+
+class ParallelChecker(StockCheckerBase):
+    """Spreads (product, pincode) checks over a pool of worker processes
+
+    Each worker keeps its own driver or HTTP session and waits on a shared
+    token bucket before every request to the shop. Results come back to this
+    process, which stores them in the history and sends notifications.
+    """
+
+    def __init__(self, workers, engine="selenium", headless=True, profile=DRIVER_PROFILE, log_file=None,
+                 log_format=LOG_FORMAT, console=True, base_url=None, rate_per_minute=SHOP_RATE_LIMIT_PER_MINUTE,
+                 notifier=None, history=None):
+        self.setup_logging(log_file)
+        self.setup_state(notifier, history)
+        self.workers = workers
+        ctx = multiprocessing.get_context("spawn")
+        self.bucket = SharedTokenBucket(rate_per_minute, SHOP_RATE_BURST, ctx)
+        self.executor = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=ctx,
+            initializer=init_worker,
+            initargs=(engine, headless, profile, log_file, log_format, console, base_url, self.bucket)
+        )
+        self.cycle_stats = None
+
+    def check_batch(self, pairs):
+        """Check every pair across the worker processes and store the results here"""
+        started = time.perf_counter()
+        tasks = split_tasks(pairs, self.workers)
+        futures = [(task, self.executor.submit(run_task, task)) for task in tasks]
+
+        results = []
+        per_worker = {}
+        for task, future in futures:
+            try:
+                pid, records, busy = future.result()
+            except Exception as e:
+                self.logger.error(f"✗ Worker failed on {len(task)} check(s): {e}")
+                pid, busy = None, 0
+                records = [error_record(product_url, pincode) for product_url, pincode in task]
+
+            if pid is not None:
+                checks, busy_total = per_worker.get(pid, (0, 0))
+                per_worker[pid] = (checks + len(records), busy_total + busy)
+            results.extend(self.store_result(record) for record in records)
+
+        self.cycle_stats = {
+            "wall_time": time.perf_counter() - started,
+            "checks": len(results),
+            "workers": per_worker,
+        }
+        self.log_cycle_stats()
+        return results
+
+    def log_cycle_stats(self):
+        """Log the cycle wall time and each worker's throughput"""
+        stats = self.cycle_stats
+        rate = stats["checks"] / stats["wall_time"] * 60 if stats["wall_time"] else 0
+        self.logger.info(f"⏱️ Cycle: {stats['checks']} check(s) in {stats['wall_time']:.1f}s ({rate:.1f} checks/min)")
+        for pid, (checks, busy) in sorted(stats["workers"].items()):
+            worker_rate = checks / busy * 60 if busy else 0
+            self.logger.info(f"   worker {pid}: {checks} check(s), busy {busy:.1f}s ({worker_rate:.1f} checks/min)")
+
+    def run_stock_check(self):
+        """Run the single configured product/pincode check on a worker"""
+        return self.run_batch_check([(self.product_url, self.pincode)])
+
+    def cleanup(self):
+        """Shut the workers down (closing their browsers) and flush notifications"""
+        self.executor.shutdown(wait=True)
+        self.close_shared()
+        self.logger.info("🧹 Worker pool closed \n\n")
@@ -0,0 +1,45 @@
+# proctree.py
+import os
+
+
+def process_tree(pid):
+    """Return the pids of a process and all its descendants (Linux only)"""
+    pids = []
+    pending = [pid]
+    while pending:
+        current = pending.pop()
+        pids.append(current)
+        try:
+            for task in os.listdir(f"/proc/{current}/task"):
+                with open(f"/proc/{current}/task/{task}/children") as f:
+                    pending.extend(int(child) for child in f.read().split())
+        except (OSError, ValueError):
+            continue
+    return pids
+
+
+def process_stats(pid):
+    """Return (resident MB, number of Chrome processes) for a process tree"""
+    total_kb = 0
+    chrome_processes = 0
+    for current in process_tree(pid):
+        try:
+            with open(f"/proc/{current}/comm") as f:
+                if "chrom" in f.read():
+                    chrome_processes += 1
+            with open(f"/proc/{current}/status") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        total_kb += int(line.split()[1])
+                        break
+        except (OSError, ValueError):
+            # The process exited while we were looking at it
+            continue
+    return total_kb / 1024, chrome_processes
+
+
+def process_tree_rss_mb(pid):
+    """Return the resident memory (MB) of a process and all its descendants, or None off Linux"""
+    if not os.path.exists(f"/proc/{pid}/status"):
+        return None
+    return process_stats(pid)[0]
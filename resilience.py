@@ -0,0 +1,190 @@
+# resilience.py
+import functools
+import logging
+import random
+import time
+from datetime import datetime
+from urllib.parse import urlparse
+from config import (
+    RETRY_BACKOFF, RETRY_MAX_DELAY, CIRCUIT_BREAKER_FILE, CIRCUIT_FAILURE_THRESHOLD,
+    CIRCUIT_RESET_SECONDS
+)
+from json_store import load_json, update_json
+from metrics import STEP_RETRIES, CIRCUIT_TRANSITIONS
+
+FAILURE_CAUSES = ("site_down", "rate_limited", "selector_changed", "browser_crashed", "unexpected_response", "unknown")
+# Causes worth retrying within the same check; they also count against the host's circuit breaker
+TRANSIENT_CAUSES = ("site_down", "rate_limited")
+# WebDriver error messages of a browser (or tab) that is gone
+BROWSER_CRASH_MESSAGES = (
+    "chrome not reachable", "invalid session id", "session deleted", "disconnected",
+    "target window already closed", "no such window", "tab crashed",
+)
+
+
+def classify_failure(exc, step=None):
+    """Return the cause (one of FAILURE_CAUSES) of the exception a pipeline step failed with
+
+    Exceptions are matched by class name, so neither requests nor Selenium
+    has to be imported here.
+    """
+    names = {cls.__name__ for cls in type(exc).__mro__}
+    message = str(exc).lower()
+
+    response = getattr(exc, "response", None)
+    if "HTTPError" in names and response is not None:
+        if response.status_code == 429:
+            return "rate_limited"
+        return "site_down" if response.status_code >= 500 else "unexpected_response"
+    if names & {"ConnectionError", "Timeout", "TimeoutError"}:
+        return "site_down"
+    if names & {"InvalidSessionIdException", "NoSuchWindowException"} or any(
+            text in message for text in BROWSER_CRASH_MESSAGES):
+        return "browser_crashed"
+    if "net::err_" in message:
+        return "site_down"
+    if names & {"TimeoutException", "NoSuchElementException", "StaleElementReferenceException"}:
+        # A product page that never rendered points at the site; a missing
+        # element on a rendered page points at changed markup
+        return "site_down" if step == "navigate" else "selector_changed"
+    if "ValueError" in names:
+        return "unexpected_response"
+    return "unknown"
+
+
+def backoff_delay(attempt, base=RETRY_BACKOFF, cap=RETRY_MAX_DELAY):
+    """Seconds to wait before retry number attempt + 1: exponential, capped, with the upper half jittered"""
+    delay = min(cap, base * 2 ** attempt)
+    return delay / 2 + random.uniform(0, delay / 2)
+
+
+def retry_step(name):
+    """Retry the decorated pipeline step while it fails for a transient cause
+
+    Steps report failure by returning False or "ERROR" (or a result with
+    that status) after noting the
+    cause with self.note_failure(); failures with another cause (e.g. a
+    changed selector) are returned right away. Makes up to
+    self.retry_attempts attempts.
+    """
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            for attempt in range(self.retry_attempts):
+                self.failure = None
+                result = method(self, *args, **kwargs)
+                if getattr(result, "status", result) not in (False, "ERROR") or self.failure not in TRANSIENT_CAUSES \
+                        or attempt == self.retry_attempts - 1:
+                    return result
+                delay = backoff_delay(attempt)
+                STEP_RETRIES.inc(step=name, cause=self.failure)
+                self.logger.warning(f"🔁 {name} failed ({self.failure}), retrying in {delay:.1f}s "
+                                    f"(attempt {attempt + 2}/{self.retry_attempts})")
+                time.sleep(delay)
+        return wrapper
+    return decorator
+
+
+def product_host(product_url):
+    return urlparse(product_url).netloc
+
+
+class CircuitBreaker:
+    """Per-host circuit breaker shared by every process through a JSON file
+
+    After threshold checks of a host in a row fail for a transient cause
+    (site down, rate limited), the circuit opens and checks of that host are
+    skipped for reset_after seconds. Then one run is let through as a probe
+    (half-open): a successful check closes the circuit, another failure
+    opens it again. Hosts whose last check succeeded have no entry.
+    """
+
+    def __init__(self, path=CIRCUIT_BREAKER_FILE, threshold=CIRCUIT_FAILURE_THRESHOLD,
+                 reset_after=CIRCUIT_RESET_SECONDS):
+        self.path = path
+        self.threshold = threshold
+        self.reset_after = reset_after
+        self.logger = logging.getLogger(__name__)
+
+    def load(self):
+        return load_json(self.path)
+
+    def update(self, host, change):
+        """Apply change(entry or None) -> entry or None to the host's entry; returns (old, new) state"""
+        def apply(data):
+            entry = data.get(host)
+            old_state = entry["state"] if entry else "closed"
+            entry = change(dict(entry) if entry else None)
+            if entry is None:
+                data.pop(host, None)
+            else:
+                data[host] = entry
+            return old_state, entry["state"] if entry else "closed"
+
+        return update_json(self.path, apply)
+
+    def expired(self, entry):
+        return time.time() - entry["opened_at"] >= self.reset_after
+
+    def allow(self, host):
+        """Return whether the host may be checked now, claiming the probe of an expired open circuit"""
+        entry = self.load().get(host)
+        if not entry or entry["state"] == "closed":
+            return True
+        if not self.expired(entry):
+            return False
+
+        def claim_probe(entry):
+            # Another process may have claimed it in the meantime
+            if entry and entry["state"] != "closed" and self.expired(entry):
+                entry.update(state="half_open", opened_at=time.time())
+                claimed.append(True)
+            return entry
+
+        claimed = []
+        self.update(host, claim_probe)
+        if claimed:
+            self.logger.info(f"🔌 Circuit for {host} half-open - letting a probe check through")
+        return bool(claimed)
+
+    def allowed_pairs(self, pairs):
+        """Return the (product_url, pincode) pairs whose host's circuit lets them through"""
+        allowed = {}
+        for product_url, _ in pairs:
+            host = product_host(product_url)
+            if host not in allowed:
+                allowed[host] = self.allow(host)
+                if not allowed[host]:
+                    entry = self.load().get(host, {})
+                    retry_at = datetime.fromtimestamp(entry.get("opened_at", time.time()) + self.reset_after)
+                    self.logger.warning(f"⏸️ Circuit for {host} is open ({entry.get('cause')}) - "
+                                        f"skipping its checks until {retry_at.strftime('%H:%M:%S')}")
+        return [pair for pair in pairs if allowed[product_host(pair[0])]]
+
+    def record(self, product_url, status, cause=None):
+        """Count a check result; returns "opened" or "closed" if it changed the circuit, else None"""
+        host = product_host(product_url)
+        if status != "ERROR" and host not in self.load():
+            return None
+
+        def apply(entry):
+            if status != "ERROR":
+                return None
+            if cause not in TRANSIENT_CAUSES:
+                # The host answered; this failure says nothing about its health
+                return entry
+            entry = entry or {"state": "closed", "failures": 0}
+            entry["failures"] += 1
+            entry["cause"] = cause
+            if entry["state"] == "half_open" or (entry["state"] == "closed" and entry["failures"] >= self.threshold):
+                entry.update(state="open", opened_at=time.time())
+            return entry
+
+        old_state, new_state = self.update(host, apply)
+        if old_state == "closed" and new_state == "open":
+            CIRCUIT_TRANSITIONS.inc(state="open")
+            return "opened"
+        if old_state != "closed" and new_state == "closed":
+            CIRCUIT_TRANSITIONS.inc(state="closed")
+            return "closed"
+        return None
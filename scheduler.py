@@ -0,0 +1,235 @@
+# scheduler.py
+import os
+import shlex
+import subprocess
+import sys
+import time
+from config import SCHEDULE_TAG, SCHEDULE_INTERVAL_MINUTES, RUN_LOCK_FILE, RUN_LOCK_STALE_SECONDS
+
+SCHEDULERS = ("cron", "systemd")
+SYSTEMD_UNIT_DIR = os.path.expanduser("~/.config/systemd/user")
+
+
+def check_command(script_path):
+    """Return (project directory, argv) of a scheduled check run by the current interpreter"""
+    script_path = os.path.abspath(script_path)
+    project_dir = os.path.dirname(script_path)
+    log_file = os.path.join(project_dir, "log", "amul-log.log")
+    return project_dir, [sys.executable, script_path, "--cron", "--log-file", log_file]
+
+
+def cron_line(script_path, tag=SCHEDULE_TAG, interval=SCHEDULE_INTERVAL_MINUTES):
+    """Build the tagged crontab line; it runs from the project directory so state files land there"""
+    project_dir, argv = check_command(script_path)
+    minutes = "*" if interval == 1 else f"*/{interval}"
+    # The checker rotates its own log file; the shell only discards the (empty) console output
+    command = f"cd {shlex.quote(project_dir)} && {shlex.join(argv)} > /dev/null 2>&1"
+    return f"{minutes} * * * * {command} # {tag}"
+
+
+def is_ours(line, script_path, tag):
+    """Whether a crontab line was installed by us: tagged, or the untagged line older versions wrote"""
+    if line.rstrip().endswith(f"# {tag}"):
+        return True
+    return script_path in line and "--cron" in line and "#" not in line
+
+
+def read_crontab():
+    result = subprocess.run(["crontab", "-l"], capture_output=True, text=True)
+    # crontab -l fails when the user has no crontab yet
+    return result.stdout if result.returncode == 0 else ""
+
+
+def write_crontab(content):
+    result = subprocess.run(["crontab", "-"], input=content, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip() or f"crontab exited with {result.returncode}")
+
+
+def install_cron(script_path, tag=SCHEDULE_TAG, interval=SCHEDULE_INTERVAL_MINUTES):
+    """Install (or update) the tagged crontab entry; returns True if the crontab changed"""
+    current = read_crontab()
+    line = cron_line(script_path, tag, interval)
+    kept = [existing for existing in current.splitlines() if not is_ours(existing, os.path.abspath(script_path), tag)]
+    if line in current.splitlines() and len(kept) == len(current.splitlines()) - 1:
+        return False
+    write_crontab("\n".join(kept + [line]) + "\n")
+    return True
+
+
+def remove_cron(script_path, tag=SCHEDULE_TAG):
+    """Remove every crontab entry installed for the tag; returns True if one was removed"""
+    current = read_crontab()
+    lines = current.splitlines()
+    kept = [line for line in lines if not is_ours(line, os.path.abspath(script_path), tag)]
+    if len(kept) == len(lines):
+        return False
+    write_crontab("\n".join(kept) + "\n" if kept else "")
+    return True
+
+
+def systemd_units(script_path, tag=SCHEDULE_TAG, interval=SCHEDULE_INTERVAL_MINUTES):
+    """Return {file name: contents} of the tagged service and timer user units"""
+    project_dir, argv = check_command(script_path)
+    service = (
+        f"# Managed by main.py --setup-cron ({tag})\n"
+        "[Unit]\n"
+        "Description=Amul stock check\n\n"
+        "[Service]\n"
+        "Type=oneshot\n"
+        f"WorkingDirectory={project_dir}\n"
+        f"ExecStart={shlex.join(argv)}\n"
+    )
+    timer = (
+        f"# Managed by main.py --setup-cron ({tag})\n"
+        "[Unit]\n"
+        f"Description=Run the Amul stock check every {interval} min\n\n"
+        "[Timer]\n"
+        "OnBootSec=1min\n"
+        f"OnUnitActiveSec={interval}min\n"
+        "AccuracySec=10s\n\n"
+        "[Install]\n"
+        "WantedBy=timers.target\n"
+    )
+    return {f"{tag}.service": service, f"{tag}.timer": timer}
+
+
+def systemctl(*args):
+    result = subprocess.run(["systemctl", "--user", *args], capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip() or f"systemctl {' '.join(args)} exited with {result.returncode}")
+
+
+def install_systemd(script_path, tag=SCHEDULE_TAG, interval=SCHEDULE_INTERVAL_MINUTES, unit_dir=SYSTEMD_UNIT_DIR):
+    """Write (or update) the tagged user units and enable the timer; returns True if a unit changed"""
+    os.makedirs(unit_dir, exist_ok=True)
+    changed = False
+    for name, contents in systemd_units(script_path, tag, interval).items():
+        path = os.path.join(unit_dir, name)
+        try:
+            with open(path, "r") as f:
+                if f.read() == contents:
+                    continue
+        except OSError:
+            pass
+        with open(path, "w") as f:
+            f.write(contents)
+        changed = True
+    if changed:
+        systemctl("daemon-reload")
+    systemctl("enable", "--now", f"{tag}.timer")
+    return changed
+
+
+def remove_systemd(tag=SCHEDULE_TAG, unit_dir=SYSTEMD_UNIT_DIR):
+    """Stop and delete the tagged user units; returns True if any existed"""
+    paths = [os.path.join(unit_dir, f"{tag}.{kind}") for kind in ("timer", "service")]
+    if not any(os.path.exists(path) for path in paths):
+        return False
+    # The timer may already be disabled by hand
+    subprocess.run(["systemctl", "--user", "disable", "--now", f"{tag}.timer"], capture_output=True)
+    for path in paths:
+        if os.path.exists(path):
+            os.remove(path)
+    systemctl("daemon-reload")
+    return True
+
+
+def install_schedule(script_path, scheduler="cron", tag=SCHEDULE_TAG, interval=SCHEDULE_INTERVAL_MINUTES):
+    """Install the scheduled check with cron or a systemd user timer, printing what was done"""
+    project_dir, argv = check_command(script_path)
+    os.makedirs(os.path.join(project_dir, "log"), exist_ok=True)
+    print(f"🔍 Using Python at: {argv[0]}")
+    print(f"🔍 Project directory: {project_dir}")
+    try:
+        if scheduler == "systemd":
+            changed = install_systemd(script_path, tag, interval)
+        else:
+            changed = install_cron(script_path, tag, interval)
+    except (OSError, RuntimeError) as e:
+        print(f"❌ Error setting up the {scheduler} schedule: {e}")
+        return False
+
+    if not changed:
+        print(f"✓ {scheduler} schedule '{tag}' already up to date")
+    else:
+        print(f"✅ {scheduler} schedule '{tag}' installed!")
+    print(f"📅 Script will run every {interval} minute(s)")
+    print(f"📁 Logs will be saved in: {argv[-1]}")
+    return True
+
+
+def remove_schedule(script_path, scheduler=None, tag=SCHEDULE_TAG):
+    """Remove the tagged schedule from cron and systemd (or only the given scheduler)"""
+    removed = False
+    for name in [scheduler] if scheduler else SCHEDULERS:
+        try:
+            removed |= remove_systemd(tag) if name == "systemd" else remove_cron(script_path, tag)
+        except (OSError, RuntimeError) as e:
+            # e.g. no crontab or systemctl binary on this machine
+            if scheduler:
+                print(f"❌ Error removing the {name} schedule: {e}")
+                return False
+    print(f"✅ Schedule '{tag}' removed" if removed else f"✓ No schedule '{tag}' installed")
+    return True
+
+
+class RunLock:
+    """Single-instance lock of scheduled runs (flock on RUN_LOCK_FILE)
+
+    The kernel drops the lock when its holder exits, however it exits, so a
+    crashed run never blocks the next one. The holder writes its pid and
+    start time into the file; a run that finds the lock held longer than
+    stale_after seconds treats the holder as hung and sends it SIGTERM, so a
+    stuck browser can not hold off every later check.
+    """
+
+    def __init__(self, path=RUN_LOCK_FILE, stale_after=RUN_LOCK_STALE_SECONDS):
+        self.path = path
+        self.stale_after = stale_after
+        self.file = None
+
+    def holder(self):
+        """Return (pid, started_at) of the current holder, or (None, None)"""
+        try:
+            with open(self.path, "r") as f:
+                pid, started_at = f.read().split()
+            return int(pid), float(started_at)
+        except (OSError, ValueError):
+            return None, None
+
+    def acquire(self):
+        """Take the lock without waiting; returns False if another run holds it"""
+        import fcntl
+
+        self.file = open(self.path, "a+")
+        try:
+            fcntl.flock(self.file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            self.file.close()
+            self.file = None
+            return False
+        self.file.seek(0)
+        self.file.truncate()
+        self.file.write(f"{os.getpid()} {time.time()}\n")
+        self.file.flush()
+        return True
+
+    def stop_stale_holder(self):
+        """SIGTERM the holder if it has held the lock past stale_after; returns its pid and age if so"""
+        import signal
+
+        pid, started_at = self.holder()
+        if pid is None or time.time() - started_at < self.stale_after:
+            return None, None
+        try:
+            os.kill(pid, signal.SIGTERM)
+        except OSError:
+            # Already gone, or not ours to signal
+            pass
+        return pid, time.time() - started_at
+
+    def release(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
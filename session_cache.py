@@ -0,0 +1,59 @@
+# session_cache.py
+import time
+from config import SESSION_CACHE_FILE, SESSION_CACHE_TTL
+from json_store import load_json, update_json
+
+
+def cdp_cookie(cookie):
+    """Convert a Selenium cookie dict to Network.setCookie parameters"""
+    params = {key: cookie[key] for key in ("name", "value", "domain", "path", "secure", "httpOnly") if key in cookie}
+    if "expiry" in cookie:
+        params["expires"] = cookie["expiry"]
+    if cookie.get("sameSite") in ("Strict", "Lax", "None"):
+        params["sameSite"] = cookie["sameSite"]
+    return params
+
+
+class SessionCache:
+    """Delivery-location session state per pincode, saved to a JSON file
+
+    After a pincode has been selected once, its cookies and localStorage
+    keys are saved with the time they were captured; entries older than
+    ttl seconds (or with an expired cookie) are ignored.
+    """
+
+    def __init__(self, path=SESSION_CACHE_FILE, ttl=SESSION_CACHE_TTL):
+        self.path = path
+        self.ttl = ttl
+
+    def load(self):
+        return load_json(self.path)
+
+    def get(self, pincode):
+        """Return the saved state for a pincode, or None if there is none or it expired"""
+        if self.ttl <= 0:
+            return None
+        state = self.load().get(pincode)
+        if state is None:
+            return None
+        now = time.time()
+        if now - state["saved_at"] > self.ttl:
+            return None
+        if any(cookie.get("expiry", now + 1) <= now for cookie in state["cookies"]):
+            return None
+        return state
+
+    def save(self, pincode, origin, cookies, storage):
+        if self.ttl <= 0:
+            return
+        state = {
+            "saved_at": time.time(),
+            "origin": origin,
+            "cookies": cookies,
+            "storage": storage,
+        }
+        update_json(self.path, lambda entries: entries.update({pincode: state}))
+
+    def invalidate(self, pincode):
+        if pincode in self.load():
+            update_json(self.path, lambda entries: entries.pop(pincode, None))
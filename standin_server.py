@@ -0,0 +1,360 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for shop.amul.com
+Serves recorded fixtures (API responses and saved product pages) so the
+checker engines can be exercised offline
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from string import Template
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+from config import PINCODE_ENDPOINT, PREFERENCES_ENDPOINT, PRODUCTS_ENDPOINT
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+ERROR_ALIAS = "server-error"
+# "slow-<alias>" answers like <alias>, after SLOW_DELAY seconds
+SLOW_PREFIX = "slow-"
+SLOW_DELAY = 2.0
+# POSTs under these prefixes are recorded as delivered notifications
+NOTIFY_PREFIXES = ("/ntfy/", "/bot", "/webhook")
+PRODUCT_PAGE_PREFIX = "/en/product/"
+# Third-party host the saved page loads its tracker from; benchmarks map it to the stand-in
+TRACKER_HOST = "www.googletagmanager.com"
+# Heavy page resources a stock check does not need: path prefix -> (content type, size in bytes)
+ASSETS = {
+    "/assets/img/": ("image/jpeg", 120 * 1024),
+    "/assets/fonts/": ("font/woff2", 48 * 1024),
+    "/assets/media/": ("video/mp4", 400 * 1024),
+    "/gtag/": ("application/javascript", 90 * 1024),
+}
+# Traffic is counted per kind of resource
+TRAFFIC_KINDS = {
+    "/assets/img/": "images",
+    "/assets/fonts/": "fonts",
+    "/assets/media/": "media",
+    "/gtag/": "trackers",
+    PRODUCT_PAGE_PREFIX: "documents",
+}
+
+
+def load_fixture(*parts):
+    """Load a JSON fixture from the fixtures directory"""
+    with open(os.path.join(FIXTURE_DIR, *parts), "r") as f:
+        return json.load(f)
+
+
+def load_page_template(name):
+    """Load a saved HTML page template from the fixtures directory"""
+    with open(os.path.join(FIXTURE_DIR, "pages", name), "r") as f:
+        return Template(f.read())
+
+
+def stock_html(product):
+    """Render the stock block of a product page the way the shop does"""
+    if product is not None and product.get("layout") == "redesigned":
+        # Markup none of the stock selectors match, as after a shop redesign
+        return '<button class="btn btn-primary buy-now">Buy Now</button>'
+    if product is None or product.get("available") is None or product.get("inventory_quantity") is None:
+        return '<div class="alert alert-danger mt-3">Availability could not be determined for your location</div>'
+    if not product["available"] or product["inventory_quantity"] <= 0:
+        return '<div class="alert alert-danger mt-3">Sold Out</div>'
+    return '<a href="#" class="btn btn-primary add-to-cart">Add to Cart</a>'
+
+
+def price_html(product):
+    """Render the price block of a product page: price, struck-through MRP and the quantity picker"""
+    if product is None or product.get("price") is None:
+        return ""
+    html = f'<span class="product-price">₹{product["price"]:,}</span>'
+    if product.get("compare_price"):
+        html += f' <del class="product-mrp">₹{product["compare_price"]:,}</del>'
+    if product.get("max_order_qty"):
+        html += f' <input class="quantity" name="quantity" type="number" min="1" max="{product["max_order_qty"]}" value="1">'
+    return html
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """Request handler answering the shop endpoints from fixtures"""
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_body(self, body, content_type, status=200, headers=None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+        path = urlparse(self.path).path
+        kind = next((kind for prefix, kind in TRAFFIC_KINDS.items() if path.startswith(prefix)), "api")
+        with self.server.lock:
+            self.server.traffic[kind] += len(body)
+
+    def send_json(self, data, status=200, headers=None):
+        self.send_body(json.dumps(data).encode("utf-8"), "application/json", status, headers)
+
+    def read_body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(length) if length else b""
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+
+        if url.path == PINCODE_ENDPOINT:
+            pincode = query.get("filters[0][value]", "")
+            records = [r for r in self.server.pincodes["records"] if r["pincode"].startswith(pincode)]
+            self.send_json({"records": records})
+            return
+
+        if url.path == PRODUCTS_ENDPOINT:
+            alias = self.resolve_alias(json.loads(query.get("q", "{}")).get("alias"))
+            if alias == ERROR_ALIAS:
+                self.send_json({"error": "internal"}, status=500)
+                return
+            substore = query.get("substore") or self.substore_cookie()
+            records = [p for p in self.server.products.get(substore, []) if p.get("alias") == alias]
+            data = {"data": records[:int(query.get("limit", 1))]}
+            # Supports conditional requests like the shop's API
+            etag = '"%s"' % hashlib.sha1(json.dumps(data, sort_keys=True).encode("utf-8")).hexdigest()
+            if self.headers.get("If-None-Match") == etag:
+                self.send_response(304)
+                self.send_header("ETag", etag)
+                self.end_headers()
+                return
+            self.send_json(data, headers={"ETag": etag})
+            return
+
+        if url.path.startswith(PRODUCT_PAGE_PREFIX):
+            self.send_product_page(self.resolve_alias(url.path[len(PRODUCT_PAGE_PREFIX):].strip("/")))
+            return
+
+        for prefix, (content_type, size) in ASSETS.items():
+            if url.path.startswith(prefix):
+                self.send_body(b"\0" * size, content_type, headers={"Cache-Control": "no-store"})
+                return
+
+        self.send_json({"error": "not found"}, status=404)
+
+    def resolve_alias(self, alias):
+        """Strip the slow variant prefix from an alias, delaying the response"""
+        if alias and alias.startswith(SLOW_PREFIX):
+            time.sleep(self.server.slow_delay)
+            return alias[len(SLOW_PREFIX):]
+        return alias
+
+    def send_product_page(self, alias):
+        """Render the saved product page for the current substore cookie"""
+        if alias == ERROR_ALIAS:
+            self.send_body(b"<html><body><h1>500 Internal Server Error</h1></body></html>", "text/html", status=500)
+            return
+
+        substore = self.substore_cookie()
+        products = self.server.products.get(substore, []) if substore else []
+        product = next((p for p in products if p.get("alias") == alias), None)
+        page = self.server.product_page.substitute(
+            alias=alias,
+            name=product["name"] if product else alias.replace("-", " ").title(),
+            # The location popup is only shown until a pincode is selected
+            popup_class="hidden" if substore else "",
+            stock_html=stock_html(product) if substore else "",
+            price_html=price_html(product) if substore else "",
+            # Embedded product data, like the shop's page state
+            product_json=json.dumps(product if substore and product else {}).replace("</", "<\\/"),
+            tracker_host=TRACKER_HOST,
+            pincode_endpoint=PINCODE_ENDPOINT,
+            preferences_endpoint=PREFERENCES_ENDPOINT,
+        )
+        self.send_body(page.encode("utf-8"), "text/html; charset=utf-8")
+
+    def do_PUT(self):
+        url = urlparse(self.path)
+        if url.path == PREFERENCES_ENDPOINT:
+            store = json.loads(self.read_body() or b"{}").get("data", {}).get("store")
+            self.send_json({"data": {"store": store}}, headers={"Set-Cookie": f"substore={store}; Path=/"})
+            return
+        self.send_json({"error": "not found"}, status=404)
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        if url.path.startswith(NOTIFY_PREFIXES):
+            if url.path.endswith("/fail"):
+                # Lets notification retries be exercised
+                self.send_json({"error": "unavailable"}, status=503)
+                return
+            with self.server.lock:
+                self.server.notifications.append({
+                    "path": url.path,
+                    "headers": dict(self.headers),
+                    "body": self.read_body().decode("utf-8"),
+                })
+            self.send_json({"id": len(self.server.notifications)})
+            return
+        self.send_json({"error": "not found"}, status=404)
+
+    def substore_cookie(self):
+        for part in (self.headers.get("Cookie") or "").split(";"):
+            name, _, value = part.strip().partition("=")
+            if name == "substore":
+                return value
+        return None
+
+
+class StandInShopServer:
+    """Threaded local HTTP server answering like shop.amul.com"""
+
+    def __init__(self, host="127.0.0.1", port=0, slow_delay=SLOW_DELAY):
+        self.httpd = ThreadingHTTPServer((host, port), StandInHandler)
+        self.httpd.slow_delay = slow_delay
+        self.httpd.pincodes = load_fixture("http", "pincodes.json")
+        self.httpd.products = load_fixture("http", "products.json")
+        self.httpd.product_page = load_page_template("product.html")
+        self.httpd.notifications = []
+        self.httpd.traffic = Counter()
+        self.httpd.lock = threading.Lock()
+        self.thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def notifications(self):
+        return self.httpd.notifications
+
+    @property
+    def traffic(self):
+        """Bytes served so far, per kind of resource"""
+        return self.httpd.traffic
+
+    def reset_traffic(self):
+        with self.httpd.lock:
+            self.httpd.traffic.clear()
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def run_fixture_checks():
+    """Run the http engine against every recorded fixture and compare with the expected status"""
+    from http_checker import AmulHttpChecker
+    from notifier import NotificationDispatcher, NtfyChannel
+    from history import StockHistory
+    from resilience import CircuitBreaker
+
+    failures = 0
+    with StandInShopServer() as server, tempfile.TemporaryDirectory() as tmp_dir:
+        notifier = NotificationDispatcher([NtfyChannel(server=f"{server.base_url}/ntfy")])
+        history = StockHistory(":memory:")
+        # Keep the stand-in's failures out of the working copy's circuit_breaker.json
+        circuit = CircuitBreaker(os.path.join(tmp_dir, "circuit_breaker.json"))
+        for case in load_fixture("http", "expected.json"):
+            checker = AmulHttpChecker(log_file=os.devnull, base_url=server.base_url,
+                                      notifier=notifier, history=history, circuit=circuit)
+            checker.pincode = case["pincode"]
+            checker.product_url = f"{server.base_url}/en/product/{case['alias']}"
+
+            if checker.lookup_substore() and checker.set_preferences():
+                result = checker.check_stock_status()
+                checker.record_result(result)
+                status = result.status
+            else:
+                status = "ERROR"
+            checker.cleanup()
+
+            ok = status == case["status"]
+            failures += not ok
+            print(f"{'✅' if ok else '❌'} {case['alias']} @ {case['pincode']}: expected {case['status']}, got {status}")
+
+        notifier.close()
+        print(f"📱 Notifications captured: {len(server.notifications)}")
+
+    return failures == 0
+
+
+def run_lock_check():
+    """Start two overlapping --cron runs against the stand-in; the second one must skip itself"""
+    main_py = os.path.join(os.path.dirname(os.path.abspath(__file__)), "main.py")
+    with StandInShopServer() as server, tempfile.TemporaryDirectory() as run_dir:
+        # A sold out product (no alert to deliver), served slowly so the first run is still checking
+        watchlist = os.path.join(run_dir, "slow.json")
+        with open(watchlist, "w") as f:
+            json.dump({
+                "products": [f"{server.base_url}/en/product/{SLOW_PREFIX}amul-high-protein-plain-lassi-200-ml-or-pack-of-30"],
+                "pincodes": ["641014"],
+            }, f)
+
+        def start_run(name):
+            return subprocess.Popen(
+                [sys.executable, main_py, "--cron", "--engine", "http", "--base-url", server.base_url,
+                 "--watchlist", watchlist, "--log-file", os.path.join(run_dir, f"{name}.log")],
+                cwd=run_dir, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+            )
+
+        first = start_run("first")
+        time.sleep(server.httpd.slow_delay / 2)
+        second = start_run("second")
+        second.wait()
+        first.wait()
+
+        logs = {}
+        for name in ("first", "second"):
+            with open(os.path.join(run_dir, f"{name}.log"), "r") as f:
+                logs[name] = f.read()
+
+    ok = "skipping this one" in logs["second"] and "skipping this one" not in logs["first"] \
+        and "SOLD_OUT" in logs["first"] and "SOLD_OUT" not in logs["second"]
+    print(f"{'✅' if ok else '❌'} overlapping --cron runs: second run "
+          f"{'skipped' if ok else 'did not skip'} while the first held the lock")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Local stand-in for shop.amul.com')
+    parser.add_argument('--host', default='127.0.0.1', help='Interface to bind')
+    parser.add_argument('--port', type=int, default=8765, help='Port to listen on')
+    parser.add_argument('--check', action='store_true', help='Run the http engine against the recorded fixtures (and two overlapping cron runs) and exit')
+
+    args = parser.parse_args()
+
+    if args.check:
+        fixtures_ok = run_fixture_checks()
+        lock_ok = run_lock_check()
+        sys.exit(0 if fixtures_ok and lock_ok else 1)
+
+    server = StandInShopServer(args.host, args.port)
+    print(f"🏪 Stand-in shop listening on {server.base_url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
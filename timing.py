@@ -0,0 +1,22 @@
+# timing.py
+import functools
+import time
+
+
+def timed_step(name):
+    """Record how long the decorated pipeline step took in self.step_timings[name]"""
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return method(self, *args, **kwargs)
+            finally:
+                self.step_timings[name] = round(time.perf_counter() - started, 3)
+        return wrapper
+    return decorator
+
+
+def format_timings(step_timings):
+    """Format step timings for a log line, e.g. "navigate=1.20s stock_read=0.35s" """
+    return " ".join(f"{name}={seconds:.2f}s" for name, seconds in step_timings.items())
@@ -0,0 +1,44 @@
+# watchlist.py
+import json
+from config import WATCHLIST_FILE
+
+
+def load_watchlist_entries(path=WATCHLIST_FILE):
+    """Load the watchlist file and return one entry dict per product and pincode
+
+    The file lists products and pincodes; every product is checked for every pincode.
+    Products may be plain URLs or objects with a "url" key and an optional
+    "interval" (seconds between checks in daemon mode).
+    """
+    with open(path, "r") as f:
+        data = json.load(f)
+
+    pincodes = [str(pincode) for pincode in data.get("pincodes", [])]
+    products = [
+        product if isinstance(product, dict) else {"url": product}
+        for product in data.get("products", [])
+    ]
+
+    if not pincodes or not products:
+        raise ValueError(f"Watchlist {path} needs at least one product and one pincode")
+
+    return [
+        {"product_url": product["url"], "pincode": pincode, "interval": product.get("interval")}
+        for pincode in pincodes
+        for product in products
+    ]
+
+
+def load_watchlist(path=WATCHLIST_FILE):
+    """Load the watchlist file and return every (product_url, pincode) pair to check"""
+    return [(entry["product_url"], entry["pincode"]) for entry in load_watchlist_entries(path)]
+
+
+def group_by_pincode(pairs):
+    """Group (product_url, pincode) pairs into {pincode: [product_url, ...]} keeping order"""
+    groups = {}
+    for product_url, pincode in pairs:
+        urls = groups.setdefault(pincode, [])
+        if product_url not in urls:
+            urls.append(product_url)
+    return groups